@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: admin analytics over a large application snapshot.
+
+Times the vectorized report computation on --rows synthetic applications
+(built directly as columns, as the Arrow loader would return them), then
+measures the analytics endpoints end to end on --db-rows applications:
+the first request loads and computes, later ones are served from the
+per-window cache.
+
+    python -m benchmarks.bench_analytics --rows 5000000 --db-rows 20000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.harness import app_client, summarize
+from utils.analytics import analytics_cache, compute_reports
+from utils.auth import create_access_token
+
+CITIZENSHIPS = ["IN", "NG", "PH", "CN", "BR", "MX", "PK", "VN", "GB", None]
+VISA_TYPES = ["tourist", "business", "student", "work", None]
+STATUSES = ["draft", "submitted", "processing", "approved", "rejected"]
+
+def synthetic_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    now = np.datetime64(datetime.utcnow(), "s")
+    status = rng.choice(len(STATUSES), rows, p=[0.4, 0.25, 0.15, 0.15, 0.05])
+    submit_seconds = rng.lognormal(mean=10.5, sigma=1.2, size=rows)
+    submit_seconds[status == 0] = np.nan
+    return pd.DataFrame({
+        "status": pd.Categorical.from_codes(status, STATUSES),
+        "createdAt": now - rng.integers(0, 365 * 86400, rows).astype("timedelta64[s]"),
+        "step": rng.integers(1, 6, rows).astype(np.int16),
+        "submitSeconds": submit_seconds,
+        "citizenship": pd.Categorical(rng.choice(np.array(CITIZENSHIPS, dtype=object), rows)),
+        "visaType": pd.Categorical(rng.choice(np.array(VISA_TYPES, dtype=object), rows)),
+    })
+
+def synthetic_documents(rows: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    for i in range(rows):
+        created = now - timedelta(seconds=int(rng.integers(0, 25 * 86400)))
+        status = STATUSES[int(rng.integers(0, len(STATUSES)))]
+        document = {
+            "userId": f"user{i % 500}",
+            "applicationNumber": f"BENCH-{i}",
+            "status": status,
+            "createdAt": created,
+            "currentStep": int(rng.integers(1, 6)),
+            "completedSteps": [1, 2],
+            "personalInfo": {"citizenship": CITIZENSHIPS[i % len(CITIZENSHIPS)]},
+            "visaType": {"id": VISA_TYPES[i % len(VISA_TYPES)]},
+        }
+        if status != "draft":
+            document["submittedAt"] = created + timedelta(hours=float(rng.uniform(0, 200)))
+        yield document
+
+async def main(args) -> int:
+    # Vectorized computation on the full snapshot size
+    frame = synthetic_frame(args.rows)
+    compute_times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        reports = compute_reports(frame)
+        compute_times.append(time.perf_counter() - start)
+    memory_mb = frame.memory_usage(deep=True).sum() / 1024 / 1024
+
+    # End to end through the app
+    async with app_client(seed=False, mongo_url=args.mongo_url) as client:
+        import server
+        db = server.app.state.resources.db
+        documents = list(synthetic_documents(args.db_rows))
+        for offset in range(0, len(documents), 10000):
+            await db.visa_applications.insert_many(documents[offset:offset + 10000])
+        admin = await db.users.insert_one({"email": "analytics@example.com", "role": "admin"})
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(admin.inserted_id), 'role': 'admin'})}"}
+
+        analytics_cache.invalidate()
+        start = time.perf_counter()
+        response = await client.get("/api/admin/analytics/funnel", params={"window": "30d"}, headers=headers)
+        cold = time.perf_counter() - start
+        response.raise_for_status()
+
+        warm = []
+        for report in ("funnel", "time-to-submit", "volume") * args.repeat:
+            start = time.perf_counter()
+            response = await client.get(f"/api/admin/analytics/{report}", params={"window": "30d"}, headers=headers)
+            warm.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    results = {
+        "snapshot_rows": args.rows,
+        "snapshot_memory_mb": round(memory_mb, 1),
+        "compute": summarize(compute_times),
+        "funnel_total": reports["funnel"]["total"],
+        "db_rows": args.db_rows,
+        "cold_request_ms": round(cold * 1000, 1),
+        "cached_requests": summarize(warm),
+    }
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--db-rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mongo-url", help="run against a real MongoDB instead of the in-memory stand-in")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Concurrency check: create many applications in parallel with no duplicate numbers.
+
+Several allocators (one per simulated worker process) draw from the same
+counter concurrently. With --mongo-url, applications are inserted into a
+throwaway database carrying the unique applicationNumber index; otherwise the
+counter lives in mongomock and duplicates are detected in memory (mongomock's
+unique index check is linear per insert). Exits non-zero on any duplicate.
+
+    python -m benchmarks.bench_application_numbers --applications 100000 --workers 8
+    python -m benchmarks.bench_application_numbers --mongo-url mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
+
+from utils.application_numbers import ApplicationNumberAllocator, is_valid_application_number
+from utils.indexes import ensure_indexes
+from benchmarks.harness import create_mock_db
+
+async def worker(db, allocator, count: int, concurrency: int, numbers: list, stats: dict, insert: bool):
+    """Create count applications using one allocator, concurrency requests at a time."""
+    remaining = count
+
+    async def create():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            number = (await allocator.reserve(db))[0]
+            if insert:
+                try:
+                    await db.visa_applications.insert_one({"applicationNumber": number})
+                except DuplicateKeyError:
+                    stats["duplicate_key_errors"] += 1
+            numbers.append(number)
+
+    await asyncio.gather(*(create() for _ in range(concurrency)))
+
+async def main(args) -> int:
+    client = None
+    if args.mongo_url:
+        client = AsyncIOMotorClient(args.mongo_url)
+        db = client[f"benchmark_numbers_{int(time.time())}"]
+        await ensure_indexes(db)
+    else:
+        db = create_mock_db("application_numbers")
+
+    numbers = []
+    stats = {"duplicate_key_errors": 0}
+    per_worker = args.applications // args.workers
+    allocators = [ApplicationNumberAllocator(args.block_size) for _ in range(args.workers)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(db, allocator, per_worker, args.concurrency, numbers, stats, insert=client is not None)
+        for allocator in allocators
+    ))
+    elapsed = time.perf_counter() - start
+    stored = await db.visa_applications.count_documents({}) if client else None
+    if client:
+        await client.drop_database(db.name)
+        client.close()
+
+    results = {
+        "applications": len(numbers),
+        "workers": args.workers,
+        "block_size": args.block_size,
+        "seconds": round(elapsed, 2),
+        "unique_numbers": len(set(numbers)),
+        "duplicates": len(numbers) - len(set(numbers)),
+        "duplicate_key_errors": stats["duplicate_key_errors"],
+        "invalid_check_characters": sum(not is_valid_application_number(number) for number in numbers),
+        "stored": stored,
+    }
+    print(json.dumps(results, indent=2))
+    ok = results["duplicates"] == 0 and results["duplicate_key_errors"] == 0 and results["invalid_check_characters"] == 0
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applications", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=50, help="parallel requests per worker")
+    parser.add_argument("--block-size", type=int, default=20)
+    parser.add_argument("--mongo-url", help="insert into a throwaway database on this server")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/countries latency while the API is under a concurrent login load.
+
+Compares bcrypt running inline on the event loop ("before") with bcrypt
+offloaded to the bounded password hashing pool ("after").
+
+    python -m benchmarks.bench_auth_pool --logins 200 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import routes.auth
+from utils.auth import verify_password, get_password_hash
+from benchmarks.harness import app_client, summarize
+
+EMAIL = "benchmark@example.com"
+PASSWORD = "benchmark-password"
+
+
+async def inline_verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Pre-pool behaviour: bcrypt runs directly on the event loop."""
+    return verify_password(plain_password, hashed_password)
+
+
+async def inline_hash_password(password: str) -> str:
+    """Pre-pool behaviour: bcrypt runs directly on the event loop."""
+    return get_password_hash(password)
+
+
+async def run_scenario(logins: int, concurrency: int, probe_interval: float) -> dict:
+    """Fire logins concurrently while probing /api/countries."""
+    async with app_client() as client:
+        response = await client.post("/api/auth/register", json={
+            "fullName": "Benchmark User",
+            "email": EMAIL,
+            "password": PASSWORD,
+        })
+        response.raise_for_status()
+
+        remaining = logins
+        statuses = {}
+        probe_samples = []
+        done = asyncio.Event()
+
+        async def login_worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                response = await client.get("/api/countries")
+                response.raise_for_status()
+                probe_samples.append(time.perf_counter() - start)
+                await asyncio.sleep(probe_interval)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+
+    return {
+        "login_seconds": round(elapsed, 3),
+        "login_statuses": statuses,
+        "countries_latency": summarize(probe_samples),
+    }
+
+
+async def main(args):
+    results = {}
+
+    routes.auth.averify_password = inline_verify_password
+    routes.auth.ahash_password = inline_hash_password
+    results["before"] = await run_scenario(args.logins, args.concurrency, args.probe_interval)
+
+    from utils import auth
+    routes.auth.averify_password = auth.averify_password
+    routes.auth.ahash_password = auth.ahash_password
+    results["after"] = await run_scenario(args.logins, args.concurrency, args.probe_interval)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
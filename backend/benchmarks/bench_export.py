@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming export of a large synthetic result set with bounded memory.
+
+Feeds synthetic application documents through the export stream as an async
+cursor would, samples the process RSS while consuming the output, and fails
+if RSS grows by more than --max-rss-growth-mb.
+
+    python -m benchmarks.bench_export --rows 1000000 --format csv
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from utils.export import ExportFormat, stream_export
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (Linux)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+async def synthetic_cursor(rows: int):
+    """Yield application-shaped documents one at a time, like a Motor cursor."""
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        created = start + timedelta(seconds=i)
+        yield {
+            "_id": ObjectId(),
+            "userId": str(ObjectId()),
+            "applicationNumber": f"USA-{created:%Y%m%d}-{i:08d}",
+            "status": "submitted" if i % 3 else "draft",
+            "visaType": {"id": "tourist", "name": "Tourist Visa", "duration": "30 days", "validity": "10 years", "price": 185.0},
+            "personalInfo": {"fullName": f"Applicant {i}", "email": f"applicant{i}@example.com", "phone": "+1-555-0100", "citizenship": "IN"},
+            "travelDetails": {"purpose": "tourism", "duration": 14, "accommodation": "Hotel", "previousVisits": False},
+            "passportInfo": {"number": f"P{i:08d}", "issuingCountry": "IN"},
+            "documents": [],
+            "payment": {"status": "pending", "amount": 185.0, "currency": "USD"},
+            "currentStep": 4,
+            "completedSteps": [1, 2, 3],
+            "createdAt": created,
+            "updatedAt": created,
+            "submittedAt": created if i % 3 else None,
+        }
+        if i % 1000 == 0:
+            await asyncio.sleep(0)
+
+async def main(args) -> int:
+    export_format = ExportFormat(args.format)
+    start_rss = peak_rss = current_rss_mb()
+    total_bytes = 0
+    chunks = 0
+
+    start = time.perf_counter()
+    async for chunk in stream_export(synthetic_cursor(args.rows), export_format, compress=not args.no_gzip):
+        total_bytes += len(chunk)
+        chunks += 1
+        if chunks % 50 == 0:
+            peak_rss = max(peak_rss, current_rss_mb())
+    elapsed = time.perf_counter() - start
+    peak_rss = max(peak_rss, current_rss_mb())
+
+    growth = peak_rss - start_rss
+    results = {
+        "rows": args.rows,
+        "format": export_format.value,
+        "gzip": not args.no_gzip,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(args.rows / elapsed),
+        "output_mb": round(total_bytes / 1024 / 1024, 2),
+        "start_rss_mb": round(start_rss, 1),
+        "peak_rss_mb": round(peak_rss, 1),
+        "rss_growth_mb": round(growth, 1),
+        "rss_bounded": growth <= args.max_rss_growth_mb,
+    }
+    print(json.dumps(results, indent=2))
+    return 0 if results["rss_bounded"] else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=[f.value for f in ExportFormat], default="ndjson")
+    parser.add_argument("--no-gzip", action="store_true")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=32.0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: FAQ search over a synthetic corpus.
+
+Compares the in-memory BM25 index with a case-insensitive regex scan over
+every document, which is what the unanchored $regex query did on the server.
+
+    python -m benchmarks.bench_faq_search --faqs 50000
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from datetime import datetime
+
+from utils.search import FAQSearchIndex
+from benchmarks.harness import summarize
+
+VOCABULARY = (
+    "visa passport interview embassy consulate appointment tourist business student "
+    "application fee payment refund document photo bank statement employment letter "
+    "itinerary hotel booking travel insurance citizenship residence permit renewal "
+    "extension processing time approval rejection appeal biometrics fingerprint form "
+    "online submit upload status tracking delivery courier validity entry exit stay "
+    "duration dependent spouse child minor sponsor invitation letter financial proof"
+).split()
+
+QUERIES = [
+    "visa", "passport renewal", "processing time", "bank statement", "interview appointment",
+    "refund", "travel insurance", "biometr", "child visa", "upload documents",
+]
+
+def synthetic_corpus(size: int, seed: int = 42) -> list:
+    """Generate FAQ-shaped documents from a fixed vocabulary."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    corpus = []
+    for i in range(size):
+        question = " ".join(rng.choices(VOCABULARY, k=rng.randint(6, 12))).capitalize() + "?"
+        answer = " ".join(rng.choices(VOCABULARY, k=rng.randint(30, 80))).capitalize() + "."
+        corpus.append({
+            "_id": i,
+            "question": question,
+            "answer": answer,
+            "category": rng.choice(["General Information", "Documents", "Payments", "Interview"]),
+            "isActive": True,
+            "order": i,
+            "createdAt": now,
+            "updatedAt": now,
+        })
+    return corpus
+
+def regex_scan(corpus: list, query: str) -> list:
+    """Equivalent of the old {"$or": [{"question": regex}, {"answer": regex}]} scan."""
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+    return [doc for doc in corpus if pattern.search(doc["question"]) or pattern.search(doc["answer"])]
+
+def time_queries(search, rounds: int) -> list:
+    samples = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            search(query)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+def main(args):
+    corpus = synthetic_corpus(args.faqs)
+
+    index = FAQSearchIndex()
+    start = time.perf_counter()
+    index.build(corpus)
+    build_seconds = time.perf_counter() - start
+
+    results = {
+        "faqs": args.faqs,
+        "index_build_seconds": round(build_seconds, 3),
+        "index_terms": len(index.vocabulary),
+        "bm25_index": summarize(time_queries(lambda q: index.search(q, limit=20), args.rounds)),
+        "regex_scan": summarize(time_queries(lambda q: regex_scan(corpus, q), args.rounds)),
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faqs", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark: background rendition pipeline for photo and passport uploads.
+
+Uploads large synthetic JPEG scans, waits for the process pool to render
+their thumbnails and review images, and measures how late a 10 ms ticker on
+the event loop runs meanwhile. --inline renders in the request path instead,
+for comparison with the blocking behaviour the pipeline avoids.
+
+    python -m benchmarks.bench_images --uploads 24 --width 4000 --height 3000
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# The storage module reads UPLOAD_DIR at import time
+UPLOAD_DIR = tempfile.mkdtemp(prefix="bench_images_")
+os.environ["UPLOAD_DIR"] = UPLOAD_DIR
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from benchmarks.harness import app_client, summarize  # noqa: E402
+from utils.images import image_pipeline, render_renditions  # noqa: E402
+from utils.storage import blob_path, rendition_dir  # noqa: E402
+
+def synthetic_scan(seed: int, width: int, height: int) -> bytes:
+    """A JPEG with enough detail to compress like a real photo."""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(400):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.ellipse(
+            (x, y, x + rng.randrange(20, 400), y + rng.randrange(20, 400)),
+            fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        )
+    image = Image.blend(image, Image.effect_noise((width, height), 40).convert("RGB"), 0.2)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+async def measure_lag(samples: list, stop: asyncio.Event, interval: float = 0.01):
+    """Record how late each 10 ms sleep wakes up."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+async def main(args) -> int:
+    scans = [synthetic_scan(seed, args.width, args.height) for seed in range(args.uploads)]
+    failures = []
+
+    async with app_client(seed=False) as client:
+        response = await client.post("/api/auth/register", json={
+            "email": "images@example.com", "password": "benchmark-password", "fullName": "Image Benchmark"
+        })
+        headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+        # Start the worker processes before timing
+        if not args.inline:
+            await image_pipeline.warm_up()
+
+        lag = []
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(measure_lag(lag, stop))
+        peak_queue = 0
+        started = time.perf_counter()
+
+        async def upload(seed: int):
+            nonlocal peak_queue
+            response = await client.post(
+                "/api/upload/documents", params={"type": "photo"}, headers=headers,
+                files={"file": (f"photo-{seed}.jpg", scans[seed], "image/jpeg")}
+            )
+            if response.status_code != 201:
+                failures.append(f"upload {seed}: {response.status_code}")
+                return None
+            sha256 = response.json()["data"]["sha256"]
+            if args.inline:
+                render_renditions(str(blob_path(sha256)), str(rendition_dir(sha256)))
+            peak_queue = max(peak_queue, image_pipeline.stats()["queued"])
+            return response.json()["data"]
+
+        documents = await asyncio.gather(*(upload(seed) for seed in range(args.uploads)))
+        upload_seconds = time.perf_counter() - started
+        while image_pipeline.stats()["inFlight"]:
+            await asyncio.sleep(0.01)
+        total_seconds = time.perf_counter() - started
+        stop.set()
+        await ticker
+
+        # Every upload must have both renditions available
+        for document in filter(None, documents):
+            for name, url in document["renditions"].items():
+                response = await client.get(url, headers={**headers, "Accept": "image/webp"})
+                if response.status_code != 200:
+                    failures.append(f"{name} of {document['document_id']}: {response.status_code}")
+
+        original_mb = sum(len(scan) for scan in scans) / 1024 / 1024
+        thumbnail_kb = sum(
+            (rendition_dir(document["sha256"]) / "thumbnail.webp").stat().st_size
+            for document in filter(None, documents)
+        ) / 1024
+
+    image_pipeline.shutdown()
+    results = {
+        "mode": "inline" if args.inline else f"process pool ({image_pipeline.workers} workers)",
+        "uploads": args.uploads,
+        "image": f"{args.width}x{args.height}",
+        "original_mb": round(original_mb, 1),
+        "thumbnail_webp_kb_total": round(thumbnail_kb, 1),
+        "upload_seconds": round(upload_seconds, 2),
+        "rendered_seconds": round(total_seconds, 2),
+        "images_per_second": round(args.uploads / total_seconds, 1),
+        "peak_queue_depth": peak_queue,
+        "event_loop_lag": summarize(lag),
+        "failures": failures,
+    }
+    print(json.dumps(results, indent=2))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=24)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--inline", action="store_true", help="render in the request path instead")
+    try:
+        sys.exit(asyncio.run(main(parser.parse_args())))
+    finally:
+        shutil.rmtree(UPLOAD_DIR, ignore_errors=True)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cache invalidation across workers, change streams versus polling.
+
+Simulates several workers, each with its own InvalidationChannel, sharing one
+database. Every write to the faqs collection must invalidate the FAQ cache of
+every worker; the benchmark reports how long that takes.
+
+In change stream mode the writes go straight to the collection without
+publish(), as hand edits in Mongo would, so only the stream can catch them.
+Without --mongo-url the database is the in-memory stand-in wrapped with a fake
+change stream that reports each write to every open stream. Change streams
+need a replica set, so a real run needs one, e.g. a single node started with
+`mongod --replSet rs0` and initiated with `rs.initiate()`:
+
+    python -m benchmarks.bench_invalidation --workers 4 --writes 50
+    python -m benchmarks.bench_invalidation --mongo-url "mongodb://localhost:27017/?replicaSet=rs0"
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from mongomock_motor import AsyncMongoMockClient
+
+from benchmarks.harness import summarize
+from utils.invalidation import InvalidationChannel
+
+WRITE_METHODS = {
+    "insert_one": "insert",
+    "insert_many": "insert",
+    "update_one": "update",
+    "update_many": "update",
+    "replace_one": "replace",
+    "delete_one": "delete",
+    "delete_many": "delete",
+}
+
+class FakeChangeStream:
+    """An async change stream fed by FakeStreamDatabase writes."""
+
+    def __init__(self, source: "FakeStreamDatabase", pipeline: list):
+        self.source = source
+        self.collections = None
+        for stage in pipeline:
+            match = stage.get("$match", {}).get("ns.coll", {})
+            if "$in" in match:
+                self.collections = set(match["$in"])
+        self.queue = asyncio.Queue()
+
+    async def __aenter__(self):
+        self.source.streams.append(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.source.streams.remove(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    def push(self, change: dict):
+        if self.collections is None or change["ns"]["coll"] in self.collections:
+            self.queue.put_nowait(change)
+
+class FakeStreamCollection:
+    """Collection wrapper reporting writes to the open change streams."""
+
+    def __init__(self, source: "FakeStreamDatabase", collection):
+        self._source = source
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in WRITE_METHODS:
+            return attribute
+
+        async def write(*args, **kwargs):
+            result = await attribute(*args, **kwargs)
+            change = {"operationType": WRITE_METHODS[name], "ns": {"db": self._source.name, "coll": self._collection.name}}
+            for stream in list(self._source.streams):
+                stream.push(change)
+            return result
+        return write
+
+class FakeStreamDatabase:
+    """In-memory database whose watch() reports writes made through it."""
+
+    def __init__(self, db):
+        self._db = db
+        self.name = db.name
+        self.streams = []
+
+    def watch(self, pipeline=None, **kwargs):
+        return FakeChangeStream(self, pipeline or [])
+
+    def __getitem__(self, name):
+        return FakeStreamCollection(self, self._db[name])
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+class Worker:
+    """One simulated worker: an invalidation channel and a cache that records invalidations."""
+
+    def __init__(self, mode: str, interval: float):
+        self.channel = InvalidationChannel()
+        self.channel.subscribe("faqs", self.invalidate, collection="faqs")
+        self.mode = mode
+        self.interval = interval
+        self.invalidated = asyncio.Event()
+
+    def invalidate(self):
+        self.invalidated.set()
+
+    async def start(self, db):
+        await self.channel.sync(db)
+        self.task = asyncio.create_task(self.channel.run(lambda: db, self.interval, mode=self.mode))
+        # Wait until the channel follows changes, then ignore the invalidation it does on connect
+        while self.channel.mode not in ("changestream", "poll"):
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        self.invalidated.clear()
+
+    async def stop(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+async def measure(mode: str, databases: list, writes: int, interval: float) -> dict:
+    """Time from each write until every worker has invalidated its cache."""
+    workers = [Worker(mode, interval) for _ in databases]
+    for worker, db in zip(workers, databases):
+        await worker.start(db)
+    writer_db = databases[0]
+    writer = workers[0].channel
+
+    latencies = []
+    try:
+        for i in range(writes):
+            for worker in workers:
+                worker.invalidated.clear()
+            start = time.perf_counter()
+            await writer_db.faqs.update_one({"_id": "benchmark"}, {"$set": {"order": i}}, upsert=True)
+            if writer.mode == "poll":
+                # Polling only sees changes announced through publish()
+                await writer.publish(writer_db, "faqs")
+            await asyncio.wait_for(asyncio.gather(*(w.invalidated.wait() for w in workers)), timeout=interval * 5 + 5)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        for worker in workers:
+            await worker.stop()
+
+    return {"mode": writer.mode, "writes": writes, "propagation_ms": summarize(latencies)}
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--mongo-url", help="replica set to run against instead of the in-memory fake")
+    args = parser.parse_args()
+
+    clients = []
+    if args.mongo_url:
+        # One client per worker, like separate processes
+        clients = [AsyncIOMotorClient(args.mongo_url) for _ in range(args.workers)]
+        db_name = f"benchmark_invalidation_{int(time.time())}"
+        stream_dbs = poll_dbs = [client[db_name] for client in clients]
+    else:
+        db = AsyncMongoMockClient()["benchmark_invalidation"]
+        shared = FakeStreamDatabase(db)
+        stream_dbs = [shared] * args.workers
+        # The plain stand-in has no change streams, which exercises the polling fallback
+        poll_dbs = [db] * args.workers
+
+    try:
+        results = [
+            await measure("auto", stream_dbs, args.writes, args.poll_interval),
+            await measure("auto", poll_dbs, args.writes, args.poll_interval) if not args.mongo_url
+            else await measure("poll", poll_dbs, args.writes, args.poll_interval),
+        ]
+    finally:
+        if clients:
+            await clients[0].drop_database(db_name)
+            for client in clients:
+                client.close()
+
+    print(json.dumps({"workers": args.workers, "pollInterval": args.poll_interval, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Benchmark: access token verification cost per request.
+
+Times python-jose and PyJWT decoding the same token, and a cache hit in
+verify_token. Run the load suite to see the cache hit rate under load.
+
+    python -m benchmarks.bench_jwt --iterations 20000
+"""
+
+import argparse
+import json
+import time
+
+import jwt as pyjwt
+from jose import jwt as jose_jwt
+
+from utils import auth
+
+def per_call_us(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return round((time.perf_counter() - start) / iterations * 1_000_000, 2)
+
+def main(args):
+    token = auth.create_access_token({"sub": "64b7f0c2a1b2c3d4e5f60718"})
+    key, algorithm = auth.SECRET_KEY, auth.ALGORITHM
+
+    auth.verify_token(token)
+    results = {
+        "python_jose_decode_us": per_call_us(lambda: jose_jwt.decode(token, key, algorithms=[algorithm]), args.iterations),
+        "pyjwt_decode_us": per_call_us(lambda: pyjwt.decode(token, key, algorithms=[algorithm]), args.iterations),
+        "verify_token_cached_us": per_call_us(lambda: auth.verify_token(token), args.iterations),
+        "token_cache": auth.token_cache_stats(),
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    main(parser.parse_args())
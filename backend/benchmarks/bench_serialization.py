@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: serializing application list responses.
+
+"model" is the previous path: build a VisaApplicationResponse per row, call
+.dict(), then let FastAPI run jsonable_encoder and json.dumps. "direct" shapes
+the BSON documents and encodes them to bytes in one pass.
+
+    python -m benchmarks.bench_serialization
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from models.visa_application import VisaApplication, VisaApplicationResponse
+from utils.serialization import dumps, shape_document
+from benchmarks.harness import summarize
+
+def synthetic_applications(rows: int) -> list:
+    """Application documents as Motor returns them."""
+    start = datetime(2024, 1, 1, 12, 30)
+    documents = []
+    for i in range(rows):
+        application = VisaApplication(
+            userId=str(ObjectId()),
+            applicationNumber=f"USA-20240101-{i:06d}",
+            visaType={"id": "tourist", "name": "Tourist Visa", "duration": "30 days", "validity": "10 years", "price": 185.0},
+            personalInfo={"fullName": f"Applicant {i}", "email": f"applicant{i}@example.com", "citizenship": "IN"},
+            travelDetails={"purpose": "tourism", "duration": 14},
+            passportInfo={"number": f"P{i:08d}", "issuingCountry": "IN"},
+            currentStep=3,
+            completedSteps=[1, 2],
+            createdAt=start + timedelta(minutes=i),
+            updatedAt=start + timedelta(minutes=i),
+        )
+        document = application.dict()
+        document["_id"] = ObjectId()
+        documents.append(document)
+    return documents
+
+def model_path(documents: list) -> bytes:
+    data = []
+    for app in documents:
+        app_response = VisaApplicationResponse(
+            _id=str(app["_id"]),
+            userId=app["userId"],
+            applicationNumber=app["applicationNumber"],
+            status=app["status"],
+            visaType=app.get("visaType"),
+            personalInfo=app["personalInfo"],
+            travelDetails=app["travelDetails"],
+            passportInfo=app["passportInfo"],
+            documents=app.get("documents", []),
+            payment=app["payment"],
+            currentStep=app["currentStep"],
+            completedSteps=app["completedSteps"],
+            createdAt=app["createdAt"],
+            updatedAt=app["updatedAt"],
+            submittedAt=app.get("submittedAt"),
+            version=app.get("version", 0)
+        )
+        data.append(app_response.dict())
+    payload = {"success": True, "data": data, "message": "Applications retrieved successfully"}
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def direct_path(documents: list) -> bytes:
+    data = [shape_document(app, VisaApplicationResponse) for app in documents]
+    return dumps({"success": True, "data": data, "message": "Applications retrieved successfully"})
+
+def measure(func, documents: list, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(documents)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main(args):
+    results = {}
+    for rows in args.rows:
+        documents = synthetic_applications(rows)
+        if json.loads(model_path(documents)) != json.loads(direct_path(documents)):
+            raise SystemExit(f"Serialized output differs for {rows} rows")
+
+        model = summarize(measure(model_path, documents, args.iterations))
+        direct = summarize(measure(direct_path, documents, args.iterations))
+        results[f"{rows}_rows"] = {
+            "model": model,
+            "direct": direct,
+            "speedup_p50": round(model["p50_ms"] / direct["p50_ms"], 1) if direct["p50_ms"] else None,
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--iterations", type=int, default=50)
+    main(parser.parse_args())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent 20 MB passport scan uploads and range reads.
+
+Streams multipart bodies through the app in 64 KB chunks (the client never
+holds a whole file), reports upload throughput and the process RSS growth,
+then checks that downloads honour Range and If-None-Match. Files are written
+to a temporary UPLOAD_DIR that is removed afterwards.
+
+    python -m benchmarks.bench_uploads --uploads 32 --concurrency 8 --size-mb 20
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# The storage module reads UPLOAD_DIR at import time
+UPLOAD_DIR = tempfile.mkdtemp(prefix="bench_uploads_")
+os.environ["UPLOAD_DIR"] = UPLOAD_DIR
+
+from benchmarks.harness import app_client, summarize  # noqa: E402
+
+CLIENT_CHUNK = 64 * 1024
+BOUNDARY = "benchmarkboundary7MA4YWxkTrZu0gW"
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (Linux)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def file_chunk(seed: int, index: int) -> bytes:
+    """Deterministic pseudo-random chunk so every upload has distinct content."""
+    block = hashlib.sha256(f"{seed}:{index}".encode()).digest()
+    return block * (CLIENT_CHUNK // len(block))
+
+def expected_sha256(seed: int, size: int) -> str:
+    digest = hashlib.sha256()
+    for index in range(size // CLIENT_CHUNK):
+        digest.update(file_chunk(seed, index))
+    return digest.hexdigest()
+
+async def multipart_body(seed: int, size: int):
+    yield (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="passport-{seed}.pdf"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode()
+    for index in range(size // CLIENT_CHUNK):
+        yield file_chunk(seed, index)
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+async def register(client, email: str) -> dict:
+    response = await client.post("/api/auth/register", json={
+        "email": email, "password": "benchmark-password", "fullName": "Upload Benchmark"
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+async def main(args) -> int:
+    size = args.size_mb * 1024 * 1024
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={BOUNDARY}",
+    }
+    failures = []
+
+    async with app_client(seed=False) as client:
+        headers.update(await register(client, "uploads@example.com"))
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies = []
+        uploaded = {}
+        start_rss = peak_rss = current_rss_mb()
+
+        async def sample_rss():
+            nonlocal peak_rss
+            while True:
+                peak_rss = max(peak_rss, current_rss_mb())
+                await asyncio.sleep(0.05)
+
+        async def upload(seed: int):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/upload/documents", params={"type": "passport"},
+                    headers=headers, content=multipart_body(seed, size)
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 201:
+                    failures.append(f"upload {seed}: {response.status_code} {response.text[:200]}")
+                else:
+                    uploaded[seed] = response.json()["data"]
+
+        sampler = asyncio.create_task(sample_rss())
+        started = time.perf_counter()
+        await asyncio.gather(*(upload(seed) for seed in range(args.uploads)))
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+        peak_rss = max(peak_rss, current_rss_mb())
+
+        # Verify hashes and exercise range / conditional downloads on one document
+        for seed, document in list(uploaded.items())[:3]:
+            if document["sha256"] != expected_sha256(seed, size):
+                failures.append(f"upload {seed}: sha256 mismatch")
+        if uploaded:
+            seed, document = next(iter(uploaded.items()))
+            url = document["fileUrl"]
+            response = await client.get(url, headers={**headers, "Range": "bytes=100-1123"})
+            expected = file_chunk(seed, 0)[100:1124]
+            if response.status_code != 206 or response.content != expected:
+                failures.append(f"range read: {response.status_code}")
+            response = await client.get(url, headers={**headers, "Range": f"bytes={size}-"})
+            if response.status_code != 416:
+                failures.append(f"unsatisfiable range: {response.status_code}")
+            response = await client.get(url, headers={**headers, "If-None-Match": f'"{document["sha256"]}"'})
+            if response.status_code != 304:
+                failures.append(f"conditional read: {response.status_code}")
+
+        # An oversized photo must be rejected while streaming
+        response = await client.post(
+            "/api/upload/documents", params={"type": "photo"},
+            headers=headers, content=multipart_body(-1, 6 * 1024 * 1024)
+        )
+        if response.status_code != 413:
+            failures.append(f"oversized photo: {response.status_code}")
+
+    total_mb = args.uploads * args.size_mb
+    results = {
+        "uploads": args.uploads,
+        "concurrency": args.concurrency,
+        "size_mb": args.size_mb,
+        "seconds": round(elapsed, 2),
+        "throughput_mb_per_second": round(total_mb / elapsed, 1),
+        "latency": summarize(latencies),
+        "start_rss_mb": round(start_rss, 1),
+        "peak_rss_mb": round(peak_rss, 1),
+        "rss_growth_mb": round(peak_rss - start_rss, 1),
+        "failures": failures,
+    }
+    print(json.dumps(results, indent=2))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=20)
+    try:
+        sys.exit(asyncio.run(main(parser.parse_args())))
+    finally:
+        shutil.rmtree(UPLOAD_DIR, ignore_errors=True)
@@ -0,0 +1,98 @@
+"""
+Shared helpers for the backend benchmarks.
+
+Benchmarks run the FastAPI app in-process through httpx's ASGI transport and
+point it at an in-memory Mongo stand-in (mongomock-motor), so they need no
+running server or database. Run them from the backend directory, e.g.:
+
+    python -m benchmarks.bench_auth_pool
+"""
+
+import logging
+import os
+import statistics
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from mongomock_motor import AsyncMongoMockClient
+
+# Benchmarks drive far more traffic from one client than the rate limits allow
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import server  # noqa: E402
+from routes.countries import seed_countries
+from routes.faqs import seed_faqs
+from utils.resources import AppResources
+
+# Per-request httpx logging drowns out benchmark output
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def create_mock_db(name: str = "benchmark"):
+    """Create an in-memory database and point the app at it."""
+    client = AsyncMongoMockClient()
+    db = client[name]
+    server.app.state.resources = AppResources(client, db)
+    return db
+
+
+@asynccontextmanager
+async def app_client(seed: bool = True, mongo_url: str = None):
+    """Yield an httpx client bound to the app with a fresh, seeded database.
+
+    With mongo_url, a throwaway database on that server is used (and dropped
+    afterwards) instead of the in-memory stand-in.
+    """
+    mongo_client = None
+    if mongo_url:
+        mongo_client = AsyncIOMotorClient(mongo_url)
+        db = mongo_client[f"benchmark_{int(time.time())}"]
+        server.app.state.resources = AppResources(mongo_client, db)
+    else:
+        db = create_mock_db()
+    if seed:
+        await seed_countries(db)
+        await seed_faqs(db)
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            yield client
+    finally:
+        if mongo_client is not None:
+            await mongo_client.drop_database(db.name)
+            mongo_client.close()
+
+
+def percentile(samples, pct: float) -> float:
+    """Return the pct-th percentile of samples (nearest-rank)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples) -> dict:
+    """Summarize latency samples (seconds) in milliseconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+class Timer:
+    """Context manager measuring wall-clock time in seconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
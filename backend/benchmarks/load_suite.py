@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Load-testing suite for the backend API.
+
+Replays the backend_test.py scenarios concurrently against the app running
+in-process: each virtual user registers, logs in, creates an application,
+saves the wizard steps, submits it, lists its applications, searches the FAQs
+and lists countries. Reports throughput, p50/p95/p99 per endpoint,
+event-loop lag and the access token cache hit rate, and writes
+machine-readable JSON so runs can be compared between commits.
+
+    python -m benchmarks.load_suite --users 50 --output results.json
+    python -m benchmarks.load_suite --users 50 --baseline results.json
+    python -m benchmarks.load_suite --mongo-url mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from utils.auth import token_cache_stats
+from benchmarks.harness import app_client, summarize
+
+FAQ_QUERIES = ["visa", "interview", "eligib", "documents required", "processing time"]
+
+APPLICATION_DATA = {
+    "visaType": {
+        "id": "tourist",
+        "name": "Tourist Visa",
+        "duration": "90 days",
+        "validity": "10 years",
+        "price": 160.0
+    },
+}
+
+WIZARD_STEPS = [
+    {"personalInfo": {
+        "fullName": "Sarah Johnson",
+        "email": "sarah.johnson@example.com",
+        "phone": "+1-555-0123",
+        "citizenship": "United States",
+        "placeOfBirth": "New York, NY",
+        "gender": "Female"
+    }, "currentStep": 2, "completedSteps": [1]},
+    {"travelDetails": {
+        "purpose": "Tourism",
+        "duration": 30,
+        "accommodation": "Hotel Booking Confirmed",
+        "previousVisits": False
+    }, "currentStep": 3, "completedSteps": [1, 2]},
+    {"passportInfo": {
+        "number": "123456789",
+        "issuingCountry": "United States"
+    }, "currentStep": 4, "completedSteps": [1, 2, 3]},
+]
+
+class LoadRecorder:
+    """Collects latency samples and errors per endpoint."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, client, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+async def virtual_user(client, recorder: LoadRecorder, index: int, iterations: int):
+    """One user walking through the application flow."""
+    credentials = {"email": f"load-user-{index}@example.com", "password": "SecurePass123"}
+    await recorder.request(client, "POST /auth/register", "POST", "/api/auth/register", json={
+        "fullName": f"Load User {index}", **credentials
+    })
+    response = await recorder.request(client, "POST /auth/login", "POST", "/api/auth/login", json=credentials)
+    if response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+    for iteration in range(iterations):
+        await recorder.request(client, "GET /countries", "GET", "/api/countries")
+
+        response = await recorder.request(
+            client, "POST /visa-applications", "POST", "/api/visa-applications",
+            json=APPLICATION_DATA, headers=headers
+        )
+        if response.status_code != 200:
+            continue
+        application_id = response.json()["data"]["application_id"]
+
+        for step in WIZARD_STEPS:
+            await recorder.request(
+                client, "PUT /visa-applications/{application_id}", "PUT",
+                f"/api/visa-applications/{application_id}", json=step, headers=headers
+            )
+
+        query = FAQ_QUERIES[(index + iteration) % len(FAQ_QUERIES)]
+        await recorder.request(client, "GET /faqs/search", "GET", "/api/faqs/search", params={"q": query})
+
+        await recorder.request(
+            client, "POST /visa-applications/{application_id}/submit", "POST",
+            f"/api/visa-applications/{application_id}/submit", headers=headers
+        )
+        await recorder.request(client, "GET /visa-applications", "GET", "/api/visa-applications", headers=headers)
+        await recorder.request(
+            client, "GET /visa-applications/{application_id}", "GET",
+            f"/api/visa-applications/{application_id}", headers=headers
+        )
+
+async def monitor_event_loop(samples: list, stop: asyncio.Event, interval: float = 0.01):
+    """Record how late the event loop wakes up from a fixed sleep."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+async def run(args) -> dict:
+    recorder = LoadRecorder()
+    lag_samples = []
+    stop = asyncio.Event()
+
+    async with app_client(mongo_url=args.mongo_url) as client:
+        monitor = asyncio.create_task(monitor_event_loop(lag_samples, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            virtual_user(client, recorder, index, args.iterations) for index in range(args.users)
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await monitor
+
+    total_requests = sum(len(samples) for samples in recorder.samples.values())
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "users": args.users,
+            "iterations": args.iterations,
+            "database": "mongodb" if args.mongo_url else "mongomock",
+        },
+        "seconds": round(elapsed, 3),
+        "requests": total_requests,
+        "throughput_rps": round(total_requests / elapsed, 1),
+        "endpoints": {
+            name: {**summarize(samples), "errors": recorder.errors[name]}
+            for name, samples in sorted(recorder.samples.items())
+        },
+        "event_loop_lag": summarize(lag_samples),
+        "token_cache": token_cache_stats(),
+    }
+
+def compare(results: dict, baseline: dict):
+    """Print p95 changes per endpoint relative to a baseline run."""
+    print(f"\nCompared with {baseline['meta']['commit']} ({baseline['meta']['timestamp']}):")
+    rows = [("throughput_rps", baseline["throughput_rps"], results["throughput_rps"])]
+    for name, stats in results["endpoints"].items():
+        if name in baseline["endpoints"]:
+            rows.append((f"{name} p95_ms", baseline["endpoints"][name]["p95_ms"], stats["p95_ms"]))
+    rows.append(("event_loop_lag p99_ms", baseline["event_loop_lag"]["p99_ms"], results["event_loop_lag"]["p99_ms"]))
+
+    for name, before, after in rows:
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"  {name:<55} {before:>10} -> {after:<10} {change}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=3, help="application flows per user")
+    parser.add_argument("--mongo-url", help="run against a throwaway database on this server instead of mongomock")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            compare(results, json.load(baseline))
+
+if __name__ == "__main__":
+    main()
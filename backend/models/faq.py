@@ -1,12 +1,12 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class FAQCreate(BaseModel):
     question: str = Field(..., min_length=10)
     answer: str = Field(..., min_length=20)
     category: str = Field(..., min_length=2)
-    order: Optional[int] = 0
+    order: int = 0
 
 class FAQUpdate(BaseModel):
     question: Optional[str] = Field(None, min_length=10)
@@ -15,6 +15,13 @@ class FAQUpdate(BaseModel):
     isActive: Optional[bool] = None
     order: Optional[int] = None
 
+class FAQOrder(BaseModel):
+    id: str
+    order: int
+
+class FAQReorder(BaseModel):
+    items: List[FAQOrder] = Field(..., min_length=1, max_length=500)
+
 class FAQResponse(BaseModel):
     id: str = Field(alias="_id")
     question: str
@@ -23,6 +23,9 @@ class UserUpdate(BaseModel):
     phone: Optional[str] = None
     citizenship: Optional[str] = None
 
+class UserRoleUpdate(BaseModel):
+    role: UserRole
+
 class UserResponse(BaseModel):
     id: str = Field(alias="_id")
     fullName: str
@@ -45,5 +48,6 @@ class User(BaseModel):
     citizenship: Optional[str] = None
     isEmailVerified: bool = False
     role: UserRole = UserRole.USER
+    tokenVersion: int = 0  # Bumped to revoke every token issued so far
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
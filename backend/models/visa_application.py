@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime, date
 from enum import Enum
 
@@ -57,6 +57,10 @@ class Document(BaseModel):
     type: DocumentType
     fileName: str
     fileUrl: str
+    documentId: Optional[str] = None
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    renditions: Dict[str, str] = {}  # Rendition name -> URL, for photos and passport scans
     uploadedAt: datetime = Field(default_factory=datetime.utcnow)
 
 class Payment(BaseModel):
@@ -79,6 +83,31 @@ class VisaApplicationUpdate(BaseModel):
     passportInfo: Optional[PassportInfo] = None
     currentStep: Optional[int] = None
     completedSteps: Optional[List[int]] = None
+    version: Optional[int] = None  # Expected current version, for optimistic concurrency
+
+class BulkApplicationCreate(BaseModel):
+    applications: List[VisaApplicationCreate] = Field(..., min_length=1, max_length=500)
+
+class DocumentAttach(BaseModel):
+    documentId: str  # ID returned by POST /upload/documents
+
+class BulkSubmit(BaseModel):
+    applicationIds: List[str] = Field(..., min_length=1, max_length=500)
+
+class StatusTransition(BaseModel):
+    applicationId: str
+    status: ApplicationStatus
+
+class BulkStatusUpdate(BaseModel):
+    transitions: List[StatusTransition] = Field(..., min_length=1, max_length=500)
+
+# Statuses an application may move to, and the statuses it may move from
+STATUS_TRANSITIONS = {
+    ApplicationStatus.SUBMITTED: {ApplicationStatus.DRAFT},
+    ApplicationStatus.PROCESSING: {ApplicationStatus.SUBMITTED},
+    ApplicationStatus.APPROVED: {ApplicationStatus.PROCESSING},
+    ApplicationStatus.REJECTED: {ApplicationStatus.SUBMITTED, ApplicationStatus.PROCESSING},
+}
 
 class VisaApplicationResponse(BaseModel):
     id: str = Field(alias="_id")
@@ -96,6 +125,7 @@ class VisaApplicationResponse(BaseModel):
     createdAt: datetime
     updatedAt: datetime
     submittedAt: Optional[datetime] = None
+    version: int = 0  # Applications created before versioning have no version field
 
     class Config:
         populate_by_name = True
@@ -114,4 +144,5 @@ class VisaApplication(BaseModel):
     completedSteps: List[int] = []
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
-    submittedAt: Optional[datetime] = None
\ No newline at end of file
+    submittedAt: Optional[datetime] = None
+    version: int = 1  # New applications start at 1; version 0 means the field is missing
\ No newline at end of file
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from utils.analytics import ANALYTICS_WINDOWS, analytics_cache
+from utils.auth import get_current_admin_id
+from utils.serialization import json_response
+from utils.resources import profiled_db
+
+router = APIRouter(prefix="/admin/analytics", tags=["analytics"])
+
+get_db = profiled_db(read="analytics")
+
+async def get_report(db: AsyncIOMotorDatabase, report: str, window: str):
+    if window not in ANALYTICS_WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown window, expected one of: {', '.join(ANALYTICS_WINDOWS)}"
+        )
+    reports = await analytics_cache.get(db, window)
+    return json_response({
+        "success": True,
+        "data": {**reports[report], "window": reports["window"]},
+        "message": "Analytics retrieved successfully"
+    })
+
+@router.get("/funnel", response_model=dict)
+async def get_funnel(
+    window: str = Query("30d", description="7d, 30d, 90d, 365d or all"),
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Wizard step drop-off for applications created in the window (Admin only)."""
+    return await get_report(db, "funnel", window)
+
+@router.get("/time-to-submit", response_model=dict)
+async def get_time_to_submit(
+    window: str = Query("30d", description="7d, 30d, 90d, 365d or all"),
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Distribution of creation-to-submission times (Admin only)."""
+    return await get_report(db, "time-to-submit", window)
+
+@router.get("/volume", response_model=dict)
+async def get_volume(
+    window: str = Query("30d", description="7d, 30d, 90d, 365d or all"),
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Application volume by citizenship, visa type, status and day (Admin only)."""
+    return await get_report(db, "volume", window)
@@ -1,15 +1,40 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from models.user import User, UserCreate, UserLogin, UserResponse, UserUpdate
-from utils.auth import get_password_hash, verify_password, create_access_token, get_current_user_id
+from models.user import User, UserCreate, UserLogin, UserResponse, UserRoleUpdate, UserUpdate
+from utils.auth import (
+    ahash_password, averify_password, create_access_token, forget_user_role,
+    get_current_admin_id, get_current_user_id, token_claims, token_revocations
+)
+from utils.serialization import json_response, shape_document
+from utils.resources import get_db
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
 from datetime import datetime
+from typing import Optional
 import re
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-def get_db():
-    from server import db
-    return db
+async def revoke_user_tokens(db: AsyncIOMotorDatabase, user_id: str, changes: Optional[dict] = None) -> Optional[dict]:
+    """Apply changes to a user and invalidate every token issued to them so far.
+    
+    Returns the updated user, or None if there is no such user.
+    """
+    if not ObjectId.is_valid(user_id):
+        return None
+    update = {"$inc": {"tokenVersion": 1}, "$set": {**(changes or {}), "updatedAt": datetime.utcnow()}}
+    user = await db.users.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        update,
+        projection={"password": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if user is None:
+        return None
+    await token_revocations.revoke(db, user_id, user["tokenVersion"])
+    forget_user_role(user_id)
+    return user
 
 def validate_email(email: str) -> bool:
     """Validate email format."""
@@ -46,7 +71,7 @@ async def register(user_data: UserCreate, db: AsyncIOMotorDatabase = Depends(get
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await ahash_password(user_data.password)
     user = User(
         fullName=user_data.fullName,
         email=user_data.email,
@@ -55,11 +80,17 @@ async def register(user_data: UserCreate, db: AsyncIOMotorDatabase = Depends(get
         citizenship=user_data.citizenship
     )
     
-    # Insert user
-    result = await db.users.insert_one(user.dict())
+    # Insert user (the unique email index catches concurrent registrations)
+    try:
+        result = await db.users.insert_one(user.dict())
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     # Create access token
-    access_token = create_access_token(data={"sub": str(result.inserted_id)})
+    access_token = create_access_token(data=token_claims({"_id": result.inserted_id, **user.dict()}))
     
     return {
         "success": True,
@@ -84,14 +115,14 @@ async def login(login_data: UserLogin, db: AsyncIOMotorDatabase = Depends(get_db
         )
     
     # Verify password
-    if not verify_password(login_data.password, user["password"]):
+    if not await averify_password(login_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
     # Create access token
-    access_token = create_access_token(data={"sub": str(user["_id"])})
+    access_token = create_access_token(data=token_claims(user))
     
     return {
         "success": True,
@@ -118,24 +149,12 @@ async def get_profile(
             detail="User not found"
         )
     
-    # Convert to response model
-    user_response = UserResponse(
-        _id=str(user["_id"]),
-        fullName=user["fullName"],
-        email=user["email"],
-        phone=user.get("phone"),
-        citizenship=user.get("citizenship"),
-        isEmailVerified=user.get("isEmailVerified", False),
-        role=user.get("role", "user"),
-        createdAt=user["createdAt"],
-        updatedAt=user["updatedAt"]
-    )
-    
-    return {
+    # Convert to response format (the password hash is not a response field)
+    return json_response({
         "success": True,
-        "data": user_response.dict(),
+        "data": shape_document(user, UserResponse),
         "message": "Profile retrieved successfully"
-    }
+    })
 
 @router.put("/profile", response_model=dict)
 async def update_profile(
@@ -171,4 +190,63 @@ async def update_profile(
     return {
         "success": True,
         "message": "Profile updated successfully"
-    }
\ No newline at end of file
+    }
+
+@router.post("/logout", response_model=dict)
+async def logout(
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Log out of every session by revoking all of the user's current tokens."""
+    
+    if await revoke_user_tokens(db, user_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return {
+        "success": True,
+        "message": "Logged out successfully"
+    }
+
+@router.post("/users/{user_id}/revoke", response_model=dict)
+async def revoke_tokens(
+    user_id: str,
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Revoke all tokens issued to a user (admin only)."""
+    
+    if await revoke_user_tokens(db, user_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return {
+        "success": True,
+        "message": "User tokens revoked successfully"
+    }
+
+@router.put("/users/{user_id}/role", response_model=dict)
+async def update_role(
+    user_id: str,
+    role_data: UserRoleUpdate,
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Change a user's role (admin only); tokens carrying the old role stop working."""
+    
+    user = await revoke_user_tokens(db, user_id, {"role": role_data.role.value})
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return json_response({
+        "success": True,
+        "data": shape_document(user, UserResponse),
+        "message": "User role updated successfully"
+    })
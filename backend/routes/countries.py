@@ -1,46 +1,60 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List
 from models.country import Country, CountryResponse
+from utils.cache import CachedResponse, ResponseCache, cached_response
+from utils.invalidation import cache_invalidation
+from utils.serialization import dumps, shape_document
+from utils.resources import get_db
+import os
 
 router = APIRouter(prefix="/countries", tags=["countries"])
 
-def get_db():
-    from server import db
-    return db
+# Countries are reference data, so serialized responses are cached in-process.
+# Refills read from the primary: a refill right after an invalidation must see the write.
+COUNTRIES_CACHE_TTL = float(os.environ.get("COUNTRIES_CACHE_TTL", "300"))
+countries_cache = ResponseCache("countries", ttl=COUNTRIES_CACHE_TTL)
+cache_invalidation.subscribe("countries", countries_cache.invalidate, collection="countries")
 
-@router.get("", response_model=dict)
-async def get_countries(db: AsyncIOMotorDatabase = Depends(get_db)):
-    """Get all countries."""
+async def load_countries(db: AsyncIOMotorDatabase) -> CachedResponse:
+    """Build the country list response and store it in the cache."""
+    version = countries_cache.version
     
     # Find all countries
     cursor = db.countries.find({}).sort("name", 1)
     countries = await cursor.to_list(length=300)
     
     # Convert to response format
-    response_countries = []
-    for country in countries:
-        country_response = CountryResponse(
-            _id=str(country["_id"]),
-            code=country["code"],
-            name=country["name"],
-            flag=country["flag"],
-            visaRequired=country["visaRequired"],
-            processingTime=country.get("processingTime"),
-            validityPeriod=country.get("validityPeriod")
-        )
-        response_countries.append(country_response.dict())
+    response_countries = [shape_document(country, CountryResponse) for country in countries]
     
-    return {
+    body = dumps({
         "success": True,
         "data": response_countries,
         "message": "Countries retrieved successfully"
-    }
+    })
+    return countries_cache.set("all", body, version)
+
+@router.get("", response_model=dict)
+async def get_countries(request: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Get all countries."""
+    
+    # Serve from cache when possible
+    entry = countries_cache.get("all")
+    if entry is not None:
+        return cached_response(request, entry)
+    return cached_response(request, await load_countries(db))
 
 @router.get("/{country_code}", response_model=dict)
-async def get_country(country_code: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+async def get_country(country_code: str, request: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
     """Get a specific country by code."""
     
+    # Serve from cache when possible
+    cache_key = f"code:{country_code.upper()}"
+    entry = countries_cache.get(cache_key)
+    if entry is not None:
+        return cached_response(request, entry)
+    version = countries_cache.version
+    
     # Find country
     country = await db.countries.find_one({"code": country_code.upper()})
     
@@ -50,22 +64,12 @@ async def get_country(country_code: str, db: AsyncIOMotorDatabase = Depends(get_
             detail="Country not found"
         )
     
-    # Convert to response format
-    country_response = CountryResponse(
-        _id=str(country["_id"]),
-        code=country["code"],
-        name=country["name"],
-        flag=country["flag"],
-        visaRequired=country["visaRequired"],
-        processingTime=country.get("processingTime"),
-        validityPeriod=country.get("validityPeriod")
-    )
-    
-    return {
+    body = dumps({
         "success": True,
-        "data": country_response.dict(),
+        "data": shape_document(country, CountryResponse),
         "message": "Country retrieved successfully"
-    }
+    })
+    return cached_response(request, countries_cache.set(cache_key, body, version))
 
 # Seed countries data
 async def seed_countries(db: AsyncIOMotorDatabase):
@@ -162,4 +166,5 @@ async def seed_countries(db: AsyncIOMotorDatabase):
     
     # Insert countries
     await db.countries.insert_many(countries_data)
+    await cache_invalidation.publish(db, "countries")
     print("Countries seeded successfully")
\ No newline at end of file
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Optional
+from models.visa_application import ApplicationStatus
+from utils.auth import get_current_admin_id
+from utils.export import ExportFormat, EXPORT_MEDIA_TYPES, stream_export
+from utils.resources import profiled_db
+from datetime import datetime
+import os
+
+router = APIRouter(prefix="/admin/exports", tags=["exports"])
+
+# Documents fetched per round trip while exporting
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+
+get_db = profiled_db(read="analytics")
+
+@router.get("/visa-applications")
+async def export_applications(
+    request: Request,
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="ndjson or csv"),
+    status: Optional[ApplicationStatus] = Query(None, description="Filter by status"),
+    created_from: Optional[datetime] = Query(None, description="Only applications created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only applications created before this time"),
+    gzip: bool = Query(True, description="Compress the response when the client accepts gzip"),
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Stream visa applications as NDJSON or CSV (Admin only)."""
+    
+    # Build query
+    query = {}
+    if status:
+        query["status"] = status
+    if created_from or created_to:
+        query["createdAt"] = {}
+        if created_from:
+            query["createdAt"]["$gte"] = created_from
+        if created_to:
+            query["createdAt"]["$lt"] = created_to
+    
+    # Walk the createdAt_id index in creation order so Mongo never has to sort the whole result in memory
+    cursor = db.visa_applications.find(query, batch_size=EXPORT_BATCH_SIZE).sort([("createdAt", 1), ("_id", 1)])
+    
+    compress = gzip and "gzip" in request.headers.get("accept-encoding", "")
+    filename = f"visa-applications-{datetime.utcnow():%Y%m%d-%H%M%S}.{format.value}"
+    # The body depends on Accept-Encoding, so shared caches must key on it
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        stream_export(cursor, format, compress),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers
+    )
@@ -1,26 +1,42 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from bson import ObjectId
 from typing import List, Optional
-from models.faq import FAQ, FAQResponse
+from models.faq import FAQ, FAQCreate, FAQReorder, FAQResponse, FAQUpdate
+from utils.auth import get_current_admin_id
+from utils.cache import CachedResponse, ResponseCache, cached_response
+from utils.invalidation import cache_invalidation
+from utils.search import faq_search_index, highlight, search_faqs_ranked
+from utils.serialization import dumps, json_response, shape_document
+from utils.resources import get_db
 from datetime import datetime
-import re
+import os
 
 router = APIRouter(prefix="/faqs", tags=["faqs"])
 
-def get_db():
-    from server import db
-    return db
+# FAQ listings are served from memory and rebuilt when FAQs change
+FAQS_CACHE_TTL = float(os.environ.get("FAQS_CACHE_TTL", "300"))
+# Category filters come from the query string, so the number of cached listings is capped
+FAQS_CACHE_MAX_ENTRIES = int(os.environ.get("FAQS_CACHE_MAX_ENTRIES", "64"))
+faqs_cache = ResponseCache("faqs", ttl=FAQS_CACHE_TTL, max_entries=FAQS_CACHE_MAX_ENTRIES)
 
-@router.get("", response_model=dict)
-async def get_faqs(
-    category: Optional[str] = Query(None, description="Filter by category"),
-    db: AsyncIOMotorDatabase = Depends(get_db)
-):
-    """Get all FAQs with optional category filter."""
+# FAQ edits made by any worker rebuild the listings and search index everywhere.
+# Rebuilds read from the primary so they never cache what a lagging secondary still has.
+cache_invalidation.subscribe("faqs", faqs_cache.invalidate, collection="faqs")
+cache_invalidation.subscribe("faqs", faq_search_index.invalidate, collection="faqs")
+
+def listing_key(category: Optional[str]) -> str:
+    """Cache key for an FAQ listing; category filters match case-insensitively."""
+    return f"category:{category.strip().lower()}" if category else "all"
+
+async def load_faqs(db: AsyncIOMotorDatabase, category: Optional[str] = None) -> CachedResponse:
+    """Build an FAQ listing response and store it in the cache."""
+    version = faqs_cache.version
     
     # Build query
     query = {"isActive": True}
-    if category and category.lower() != "all":
+    if category:
         query["category"] = {"$regex": category, "$options": "i"}
     
     # Find FAQs
@@ -28,25 +44,38 @@ async def get_faqs(
     faqs = await cursor.to_list(length=100)
     
     # Convert to response format
-    response_faqs = []
-    for faq in faqs:
-        faq_response = FAQResponse(
-            _id=str(faq["_id"]),
-            question=faq["question"],
-            answer=faq["answer"],
-            category=faq["category"],
-            isActive=faq["isActive"],
-            order=faq["order"],
-            createdAt=faq["createdAt"],
-            updatedAt=faq["updatedAt"]
-        )
-        response_faqs.append(faq_response.dict())
+    response_faqs = [shape_document(faq, FAQResponse) for faq in faqs]
     
-    return {
+    body = dumps({
         "success": True,
         "data": response_faqs,
         "message": "FAQs retrieved successfully"
-    }
+    })
+    return faqs_cache.set(listing_key(category), body, version)
+
+async def invalidate_faq_read_models(db: AsyncIOMotorDatabase):
+    """Invalidate FAQ caches in every worker; each rebuilds them on its next read.
+    
+    Nothing is rebuilt eagerly: with change streams the write comes back on
+    this worker's stream too and would discard an eager rebuild at once.
+    """
+    await cache_invalidation.publish(db, "faqs")
+
+@router.get("", response_model=dict)
+async def get_faqs(
+    request: Request,
+    category: Optional[str] = Query(None, description="Filter by category"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get all FAQs with optional category filter."""
+    
+    category_filter = category.strip() if category and category.strip().lower() != "all" else None
+    
+    # Serve from cache when possible
+    entry = faqs_cache.get(listing_key(category_filter))
+    if entry is not None:
+        return cached_response(request, entry)
+    return cached_response(request, await load_faqs(db, category_filter))
 
 @router.get("/search", response_model=dict)
 async def search_faqs(
@@ -54,46 +83,28 @@ async def search_faqs(
     category: Optional[str] = Query(None, description="Filter by category"),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """Search FAQs by question or answer content."""
-    
-    # Build search query
-    search_regex = {"$regex": re.escape(q), "$options": "i"}
-    query = {
-        "isActive": True,
-        "$or": [
-            {"question": search_regex},
-            {"answer": search_regex}
-        ]
-    }
+    """Search FAQs by question or answer content, best matches first."""
     
-    # Add category filter if specified
-    if category and category.lower() != "all":
-        query["category"] = {"$regex": category, "$options": "i"}
-    
-    # Find FAQs
-    cursor = db.faqs.find(query).sort([("order", 1), ("createdAt", -1)])
-    faqs = await cursor.to_list(length=100)
+    # Rank matches with the search index
+    category_filter = category if category and category.lower() != "all" else None
+    results = await search_faqs_ranked(db, q, category_filter)
     
     # Convert to response format
     response_faqs = []
-    for faq in faqs:
-        faq_response = FAQResponse(
-            _id=str(faq["_id"]),
-            question=faq["question"],
-            answer=faq["answer"],
-            category=faq["category"],
-            isActive=faq["isActive"],
-            order=faq["order"],
-            createdAt=faq["createdAt"],
-            updatedAt=faq["updatedAt"]
-        )
-        response_faqs.append(faq_response.dict())
+    for score, faq, matched_terms in results:
+        response_faq = shape_document(faq, FAQResponse)
+        response_faq["score"] = round(score, 4)
+        response_faq["highlights"] = {
+            "question": highlight(faq["question"], matched_terms),
+            "answer": highlight(faq["answer"], matched_terms, snippet=True)
+        }
+        response_faqs.append(response_faq)
     
-    return {
+    return json_response({
         "success": True,
         "data": response_faqs,
         "message": f"Found {len(response_faqs)} FAQs matching '{q}'"
-    }
+    })
 
 # Seed FAQs data
 async def seed_faqs(db: AsyncIOMotorDatabase):
@@ -165,4 +176,120 @@ async def seed_faqs(db: AsyncIOMotorDatabase):
     
     # Insert FAQs
     await db.faqs.insert_many(faqs_data)
-    print("FAQs seeded successfully")
\ No newline at end of file
+    await cache_invalidation.publish(db, "faqs")
+    print("FAQs seeded successfully")
+
+@router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_faq(
+    faq_data: FAQCreate,
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Create an FAQ (admin only)."""
+    
+    faq = FAQ(**faq_data.dict()).dict()
+    result = await db.faqs.insert_one(faq)
+    await invalidate_faq_read_models(db)
+    
+    faq["_id"] = result.inserted_id
+    return json_response({
+        "success": True,
+        "data": shape_document(faq, FAQResponse),
+        "message": "FAQ created successfully"
+    }, status_code=status.HTTP_201_CREATED)
+
+@router.put("/order", response_model=dict)
+async def reorder_faqs(
+    reorder_data: FAQReorder,
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Set the display order of many FAQs in one batch (admin only)."""
+    
+    object_ids = []
+    for item in reorder_data.items:
+        if not ObjectId.is_valid(item.id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid FAQ ID format: {item.id}"
+            )
+        object_ids.append(ObjectId(item.id))
+    
+    # One round trip for the whole reorder
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne({"_id": object_id}, {"$set": {"order": item.order, "updatedAt": now}})
+        for object_id, item in zip(object_ids, reorder_data.items)
+    ]
+    result = await db.faqs.bulk_write(operations, ordered=False)
+    await invalidate_faq_read_models(db)
+    
+    found = {faq["_id"] async for faq in db.faqs.find({"_id": {"$in": object_ids}}, {"_id": 1})}
+    missing = [str(object_id) for object_id in object_ids if object_id not in found]
+    return json_response({
+        "success": True,
+        "data": {"matched": result.matched_count, "modified": result.modified_count, "missing": missing},
+        "message": f"Reordered {result.matched_count} FAQs"
+    })
+
+@router.put("/{faq_id}", response_model=dict)
+async def update_faq(
+    faq_id: str,
+    faq_data: FAQUpdate,
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Update an FAQ with only the fields that were sent (admin only)."""
+    
+    if not ObjectId.is_valid(faq_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid FAQ ID format"
+        )
+    
+    update_data = faq_data.dict(exclude_none=True)
+    update_data["updatedAt"] = datetime.utcnow()
+    faq = await db.faqs.find_one_and_update(
+        {"_id": ObjectId(faq_id)},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
+    )
+    if faq is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="FAQ not found"
+        )
+    await invalidate_faq_read_models(db)
+    
+    return json_response({
+        "success": True,
+        "data": shape_document(faq, FAQResponse),
+        "message": "FAQ updated successfully"
+    })
+
+@router.delete("/{faq_id}", response_model=dict)
+async def delete_faq(
+    faq_id: str,
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Delete an FAQ (admin only)."""
+    
+    if not ObjectId.is_valid(faq_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid FAQ ID format"
+        )
+    
+    result = await db.faqs.delete_one({"_id": ObjectId(faq_id)})
+    if result.deleted_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="FAQ not found"
+        )
+    await invalidate_faq_read_models(db)
+    
+    return {
+        "success": True,
+        "message": "FAQ deleted successfully"
+    }
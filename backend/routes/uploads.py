@@ -0,0 +1,201 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Header
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Optional
+from models.visa_application import DocumentType
+from utils.auth import get_current_user_id
+from utils.images import RENDITION_FORMATS, image_pipeline, is_renderable, rendition_path, rendition_urls
+from utils.storage import blob_path, iter_file_range, parse_range, receive_upload, release_blobs, store_blob
+from utils.resources import get_db
+from datetime import datetime
+from bson import ObjectId
+from urllib.parse import quote
+import asyncio
+
+router = APIRouter(prefix="/upload/documents", tags=["uploads"])
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def upload_document(
+    request: Request,
+    type: DocumentType = Query(..., description="Document type, which determines the size limit"),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Upload a document as multipart/form-data with a "file" field."""
+    
+    # Stream the file to disk, hashing and size-checking as it arrives
+    stored = await receive_upload(request, type)
+    
+    # Identical content is stored once; each upload record holds a reference to it
+    await store_blob(db, stored)
+    
+    # Thumbnails are rendered in the background; a full queue slows uploads down
+    # briefly and otherwise leaves rendering to the first rendition request
+    if is_renderable(type, stored["contentType"]):
+        await image_pipeline.submit(stored["sha256"])
+    
+    document = {
+        "userId": user_id,
+        "type": type,
+        "fileName": stored["fileName"],
+        "contentType": stored["contentType"],
+        "size": stored["size"],
+        "sha256": stored["sha256"],
+        "createdAt": datetime.utcnow()
+    }
+    result = await db.documents.insert_one(document)
+    document_id = str(result.inserted_id)
+    
+    return {
+        "success": True,
+        "data": {
+            "document_id": document_id,
+            "type": type,
+            "fileName": stored["fileName"],
+            "fileUrl": f"/api/upload/documents/{document_id}",
+            "size": stored["size"],
+            "sha256": stored["sha256"],
+            "renditions": rendition_urls(document_id, type, stored["contentType"])
+        },
+        "message": "Document uploaded successfully"
+    }
+
+async def find_document(db: AsyncIOMotorDatabase, document_id: str, user_id: str) -> dict:
+    """Fetch an upload record owned by the user or raise 400/404."""
+    if not ObjectId.is_valid(document_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid document ID"
+        )
+    
+    document = await db.documents.find_one({
+        "_id": ObjectId(document_id),
+        "userId": user_id
+    })
+    
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    return document
+
+@router.get("/{document_id}/renditions/{name}")
+async def download_rendition(
+    document_id: str,
+    name: str,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Download a downscaled rendition of a photo or passport scan, as WebP when accepted."""
+    
+    document = await find_document(db, document_id, user_id)
+    if name not in rendition_urls(document_id, document["type"], document["contentType"]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rendition not found"
+        )
+    
+    fmt = "webp" if accept and "image/webp" in accept else "jpeg"
+    etag = f'"{document["sha256"]}-{name}-{fmt}"'
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept",
+        "Cache-Control": "private, max-age=31536000, immutable"
+    }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    path = rendition_path(document["sha256"], name, fmt)
+    if not path.exists():
+        try:
+            rendered = await image_pipeline.render(document["sha256"])
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Rendition is still being generated, please retry shortly",
+                headers={"Retry-After": "5"}
+            )
+        if not rendered:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Document image could not be processed"
+            )
+    
+    return FileResponse(path, media_type=RENDITION_FORMATS[fmt][1], headers=headers)
+
+@router.get("/{document_id}")
+async def download_document(
+    document_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Download a document; supports single byte ranges and conditional requests."""
+    
+    document = await find_document(db, document_id, user_id)
+    
+    path = blob_path(document["sha256"])
+    if not path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document file is missing"
+        )
+    
+    # Content never changes for a given hash, so it makes a strong ETag
+    etag = f'"{document["sha256"]}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=0, must-revalidate",
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(document['fileName'])}"
+    }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    size = document["size"]
+    byte_range = parse_range(range_header, size) if range_header else None
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            iter_file_range(path, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=document["contentType"],
+            headers=headers
+        )
+    
+    # FileResponse uses the server's zero-copy pathsend extension when available
+    return FileResponse(path, media_type=document["contentType"], headers=headers)
+
+@router.delete("/{document_id}")
+async def delete_document(
+    document_id: str,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Delete an upload that is not attached to any application."""
+    
+    document = await find_document(db, document_id, user_id)
+    
+    attached = await db.visa_applications.count_documents(
+        {"userId": user_id, "documents.documentId": document_id}, limit=1
+    )
+    if attached:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Document is attached to an application, remove it there first"
+        )
+    
+    # The record goes first so blob collection no longer sees it
+    await db.documents.delete_one({"_id": document["_id"]})
+    await release_blobs(db, [document["sha256"]])
+    
+    return {
+        "success": True,
+        "message": "Document deleted successfully"
+    }
@@ -1,19 +1,238 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Optional
 from models.visa_application import (
     VisaApplication, VisaApplicationCreate, VisaApplicationUpdate, 
-    VisaApplicationResponse, ApplicationStatus
+    VisaApplicationResponse, ApplicationStatus, BulkApplicationCreate,
+    BulkSubmit, BulkStatusUpdate, Document, DocumentAttach, DocumentType,
+    STATUS_TRANSITIONS
 )
-from utils.auth import get_current_user_id, generate_application_number
+from utils.auth import get_current_user_id, get_current_admin_id
+from utils.application_numbers import application_numbers, next_application_number
+from utils.serialization import json_response, shape_document
+from utils.images import rendition_urls
+from utils.storage import release_blobs, release_unattached_uploads, retain_blob
+from utils.summaries import get_summary, reconcile_summaries, record_status_changes
+from utils.resources import get_db
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+import base64
+import json
 
 router = APIRouter(prefix="/visa-applications", tags=["visa-applications"])
 
-def get_db():
-    from server import db
-    return db
+# Top-level fields that can be requested with ?fields=
+APPLICATION_FIELDS = set(VisaApplicationResponse.model_fields) - {"id"}
+
+# Columns for list views; skips the personal/travel/passport subdocuments and documents
+SUMMARY_FIELDS = [
+    "applicationNumber", "status", "visaType", "payment.status", "currentStep",
+    "completedSteps", "createdAt", "updatedAt", "submittedAt"
+]
+
+def encode_cursor(application: dict) -> str:
+    """Encode the (createdAt, _id) position of an application as an opaque token."""
+    position = {"t": application["createdAt"].isoformat(), "id": str(application["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor token back into (createdAt, _id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(position["t"]), ObjectId(position["id"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def parse_if_match(if_match: str) -> Optional[int]:
+    """Parse an If-Match header carrying an application version ETag."""
+    tag = if_match.strip()
+    if tag == "*":
+        return None
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must be an application version"
+        )
+
+def build_update_delta(application_data: VisaApplicationUpdate) -> dict:
+    """Build a $set document touching only the fields the client sent.
+    
+    Subdocument fields are written as dotted paths (e.g. "personalInfo.phone")
+    so that fields the client did not send are left as they are.
+    """
+    changes = application_data.dict(exclude_unset=True, exclude={"version"})
+    update_data = {}
+    
+    for field in ("personalInfo", "travelDetails", "passportInfo"):
+        subdocument = changes.pop(field, None)
+        if subdocument is not None:
+            for key, value in subdocument.items():
+                update_data[f"{field}.{key}"] = value
+    
+    for field, value in changes.items():
+        if value is not None:
+            update_data[field] = value
+    
+    return update_data
+
+def document_hashes(documents: List[dict]) -> List[str]:
+    """Blob hashes referenced by an application's documents."""
+    return [document["sha256"] for document in documents if document.get("sha256")]
+
+async def replace_documents(
+    db: AsyncIOMotorDatabase,
+    object_id: ObjectId,
+    user_id: str,
+    document_type: DocumentType,
+    entry: Optional[dict]
+) -> List[dict]:
+    """Swap the draft's document of document_type for entry (or remove it).
+    
+    Guarded by the application version so concurrent edits are not lost.
+    Returns the documents that were replaced.
+    """
+    application = await db.visa_applications.find_one(
+        {"_id": object_id, "userId": user_id, "status": ApplicationStatus.DRAFT},
+        projection={"documents": 1, "version": 1}
+    )
+    if not application:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Application not found or already submitted"
+        )
+    
+    documents = application.get("documents", [])
+    kept = [document for document in documents if document.get("type") != document_type]
+    replaced = [document for document in documents if document.get("type") == document_type]
+    if entry is not None:
+        kept.append(entry)
+    
+    version = application.get("version")
+    result = await db.visa_applications.update_one(
+        {
+            "_id": object_id,
+            "status": ApplicationStatus.DRAFT,
+            "version": version if version is not None else {"$exists": False}
+        },
+        {"$set": {"documents": kept, "updatedAt": datetime.utcnow()}, "$inc": {"version": 1}}
+    )
+    if result.modified_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Application was modified by another session"
+        )
+    return replaced
+
+def build_projection(fields: Optional[str], summary: bool) -> Optional[dict]:
+    """Build a Mongo projection from ?fields= and ?summary=, or None for full documents."""
+    if summary:
+        requested = SUMMARY_FIELDS
+    elif fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+    else:
+        return None
+    
+    unknown = [field for field in requested if field.split(".")[0] not in APPLICATION_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    
+    # createdAt is always needed to build the next cursor; Mongo rejects a
+    # projection that names both a field and one of its subfields
+    requested = set(requested) | {"createdAt"}
+    return {
+        field: 1 for field in requested
+        if not any(field.startswith(parent + ".") for parent in requested)
+    }
+
+async def apply_status_transitions(
+    db: AsyncIOMotorDatabase,
+    transitions: List[tuple],
+    user_id: Optional[str] = None
+) -> List[dict]:
+    """Apply (application_id, status) transitions in one read and one bulk write.
+    
+    When user_id is given, only that user's applications can be changed.
+    Returns one result per transition, in order.
+    """
+    results = []
+    object_ids = {}
+    for index, (application_id, new_status) in enumerate(transitions):
+        results.append({"index": index, "application_id": application_id, "success": False})
+        if not ObjectId.is_valid(application_id):
+            results[index]["error"] = "Invalid application ID format"
+        elif ObjectId(application_id) in object_ids.values():
+            results[index]["error"] = "Duplicate application in batch"
+        else:
+            object_ids[index] = ObjectId(application_id)
+    
+    # Read current statuses in one round trip
+    query = {"_id": {"$in": list(object_ids.values())}}
+    if user_id is not None:
+        query["userId"] = user_id
+    current = {}
+    owners = {}
+    async for application in db.visa_applications.find(query, {"status": 1, "userId": 1}):
+        current[application["_id"]] = application["status"]
+        owners[application["_id"]] = application.get("userId")
+    
+    # Validate transitions and queue guarded updates
+    now = datetime.utcnow()
+    operations = []
+    pending = {}
+    for index, object_id in object_ids.items():
+        new_status = transitions[index][1]
+        old_status = current.get(object_id)
+        if old_status is None:
+            results[index]["error"] = "Application not found"
+        elif old_status not in STATUS_TRANSITIONS.get(new_status, ()):
+            results[index]["error"] = f"Cannot change status from {ApplicationStatus(old_status).value} to {new_status.value}"
+        else:
+            update = {"status": new_status, "updatedAt": now}
+            if new_status == ApplicationStatus.SUBMITTED:
+                update["submittedAt"] = now
+            # The status guard makes a concurrent change lose instead of being overwritten
+            operations.append(UpdateOne(
+                {"_id": object_id, "status": old_status},
+                {"$set": update, "$inc": {"version": 1}}
+            ))
+            pending[index] = object_id
+    
+    if operations:
+        result = await db.visa_applications.bulk_write(operations, ordered=False)
+        if result.modified_count < len(operations):
+            # Some applications changed between the read and the write; find out which
+            statuses = {}
+            async for application in db.visa_applications.find(
+                {"_id": {"$in": list(pending.values())}}, {"status": 1}
+            ):
+                statuses[application["_id"]] = application["status"]
+            for index, object_id in list(pending.items()):
+                if statuses.get(object_id) != transitions[index][1]:
+                    results[index]["error"] = "Application status changed concurrently"
+                    del pending[index]
+    
+    for index in pending:
+        results[index]["success"] = True
+        results[index]["status"] = transitions[index][1]
+    
+    await record_status_changes(db, [
+        (owners[object_id], current[object_id], transitions[index][1])
+        for index, object_id in pending.items()
+    ])
+    return results
 
 @router.post("", response_model=dict)
 async def create_application(
@@ -24,7 +243,7 @@ async def create_application(
     """Create a new visa application."""
     
     # Generate application number
-    app_number = generate_application_number()
+    app_number = await next_application_number(db)
     
     # Create application
     application = VisaApplication(
@@ -38,6 +257,7 @@ async def create_application(
     
     # Insert application
     result = await db.visa_applications.insert_one(application.dict())
+    await record_status_changes(db, [(user_id, None, ApplicationStatus.DRAFT)])
     
     return {
         "success": True,
@@ -48,44 +268,182 @@ async def create_application(
         "message": "Visa application created successfully"
     }
 
+@router.post("/bulk", response_model=dict)
+async def create_applications_bulk(
+    bulk_data: BulkApplicationCreate,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Create up to 500 visa applications in one request."""
+    
+    # Reserve all application numbers in one counter round trip
+    app_numbers = await application_numbers.reserve(db, len(bulk_data.applications))
+    
+    documents = [
+        VisaApplication(
+            userId=user_id,
+            applicationNumber=app_number,
+            visaType=application_data.visaType,
+            personalInfo=application_data.personalInfo,
+            travelDetails=application_data.travelDetails,
+            passportInfo=application_data.passportInfo
+        ).dict()
+        for application_data, app_number in zip(bulk_data.applications, app_numbers)
+    ]
+    
+    # Insert applications; unordered so one failure does not stop the rest
+    errors = {}
+    try:
+        await db.visa_applications.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        errors = {error["index"]: error.get("errmsg", "Insert failed") for error in e.details.get("writeErrors", [])}
+    
+    results = []
+    for index, document in enumerate(documents):
+        if index in errors:
+            results.append({"index": index, "success": False, "error": errors[index]})
+        else:
+            results.append({
+                "index": index,
+                "success": True,
+                "application_id": str(document["_id"]),
+                "application_number": document["applicationNumber"]
+            })
+    
+    created = len(documents) - len(errors)
+    await record_status_changes(db, [(user_id, None, ApplicationStatus.DRAFT)] * created)
+    return {
+        "success": not errors,
+        "data": {"created": created, "failed": len(errors), "results": results},
+        "message": f"Created {created} of {len(documents)} visa applications"
+    }
+
+@router.post("/bulk/submit", response_model=dict)
+async def submit_applications_bulk(
+    bulk_data: BulkSubmit,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Submit several of the current user's draft applications at once."""
+    
+    transitions = [(application_id, ApplicationStatus.SUBMITTED) for application_id in bulk_data.applicationIds]
+    results = await apply_status_transitions(db, transitions, user_id=user_id)
+    
+    updated = sum(result["success"] for result in results)
+    return {
+        "success": updated == len(results),
+        "data": {"updated": updated, "failed": len(results) - updated, "results": results},
+        "message": f"Submitted {updated} of {len(results)} applications"
+    }
+
+@router.post("/bulk/status", response_model=dict)
+async def update_application_statuses_bulk(
+    bulk_data: BulkStatusUpdate,
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Move several applications through the status workflow at once (Admin only)."""
+    
+    transitions = [(transition.applicationId, transition.status) for transition in bulk_data.transitions]
+    results = await apply_status_transitions(db, transitions)
+    
+    updated = sum(result["success"] for result in results)
+    return {
+        "success": updated == len(results),
+        "data": {"updated": updated, "failed": len(results) - updated, "results": results},
+        "message": f"Updated {updated} of {len(results)} applications"
+    }
+
+@router.get("/summary", response_model=dict)
+async def get_application_summary(
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get the current user's application counts by status."""
+    
+    return json_response({
+        "success": True,
+        "data": await get_summary(db, user_id),
+        "message": "Application summary retrieved successfully"
+    })
+
+@router.get("/summary/global", response_model=dict)
+async def get_global_application_summary(
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get application counts by status across all users (Admin only)."""
+    
+    return json_response({
+        "success": True,
+        "data": await get_summary(db),
+        "message": "Application summary retrieved successfully"
+    })
+
+@router.post("/summary/reconcile", response_model=dict)
+async def reconcile_application_summaries(
+    admin_id: str = Depends(get_current_admin_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Recompute the summary counters from the applications (Admin only)."""
+    
+    corrected = await reconcile_summaries(db)
+    return {
+        "success": True,
+        "data": {"corrected": corrected},
+        "message": "Application summaries reconciled"
+    }
+
 @router.get("", response_model=dict)
 async def get_user_applications(
+    limit: int = Query(100, ge=1, le=500, description="Maximum applications per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's nextCursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    summary: bool = Query(False, description="Return only summary columns"),
     user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """Get all applications for the current user."""
+    """Get the current user's applications, newest first, one page at a time."""
     
-    # Find applications
-    cursor = db.visa_applications.find({"userId": user_id}).sort("createdAt", -1)
-    applications = await cursor.to_list(length=100)
+    # Build query, continuing after the cursor position if given
+    query = {"userId": user_id}
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"createdAt": {"$lt": created_at}},
+            {"createdAt": created_at, "_id": {"$lt": last_id}}
+        ]
+    projection = build_projection(fields, summary)
     
-    # Convert to response format
+    # Find applications, fetching one extra to know whether another page exists
+    app_cursor = (
+        db.visa_applications.find(query, projection)
+        .sort([("createdAt", -1), ("_id", -1)])
+        .limit(limit + 1)
+    )
+    applications = await app_cursor.to_list(length=limit + 1)
+    has_more = len(applications) > limit
+    applications = applications[:limit]
+    next_cursor = encode_cursor(applications[-1]) if has_more else None
+    
+    # Convert to response format; partial documents keep only the projected fields
     response_applications = []
     for app in applications:
-        app_response = VisaApplicationResponse(
-            _id=str(app["_id"]),
-            userId=app["userId"],
-            applicationNumber=app["applicationNumber"],
-            status=app["status"],
-            visaType=app.get("visaType"),
-            personalInfo=app["personalInfo"],
-            travelDetails=app["travelDetails"],
-            passportInfo=app["passportInfo"],
-            documents=app.get("documents", []),
-            payment=app["payment"],
-            currentStep=app["currentStep"],
-            completedSteps=app["completedSteps"],
-            createdAt=app["createdAt"],
-            updatedAt=app["updatedAt"],
-            submittedAt=app.get("submittedAt")
-        )
-        response_applications.append(app_response.dict())
+        if projection is not None:
+            response_applications.append({"id": str(app.pop("_id")), **app})
+        else:
+            response_applications.append(shape_document(app, VisaApplicationResponse))
     
-    return {
+    return json_response({
         "success": True,
         "data": response_applications,
+        "pagination": {
+            "limit": limit,
+            "hasMore": has_more,
+            "nextCursor": next_cursor
+        },
         "message": "Applications retrieved successfully"
-    }
+    })
 
 @router.get("/{application_id}", response_model=dict)
 async def get_application(
@@ -115,39 +473,22 @@ async def get_application(
             detail="Application not found"
         )
     
-    # Convert to response format
-    app_response = VisaApplicationResponse(
-        _id=str(application["_id"]),
-        userId=application["userId"],
-        applicationNumber=application["applicationNumber"],
-        status=application["status"],
-        visaType=application.get("visaType"),
-        personalInfo=application["personalInfo"],
-        travelDetails=application["travelDetails"],
-        passportInfo=application["passportInfo"],
-        documents=application.get("documents", []),
-        payment=application["payment"],
-        currentStep=application["currentStep"],
-        completedSteps=application["completedSteps"],
-        createdAt=application["createdAt"],
-        updatedAt=application["updatedAt"],
-        submittedAt=application.get("submittedAt")
-    )
-    
-    return {
+    app_data = shape_document(application, VisaApplicationResponse)
+    return json_response({
         "success": True,
-        "data": app_response.dict(),
+        "data": app_data,
         "message": "Application retrieved successfully"
-    }
+    }, headers={"ETag": f'"{app_data["version"]}"'})
 
 @router.put("/{application_id}", response_model=dict)
 async def update_application(
     application_id: str,
     application_data: VisaApplicationUpdate,
+    if_match: Optional[str] = Header(None),
     user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """Update a visa application."""
+    """Update a visa application with only the fields that were sent."""
     
     try:
         object_id = ObjectId(application_id)
@@ -158,42 +499,49 @@ async def update_application(
         )
     
     # Prepare update data
-    update_data = {}
-    if application_data.visaType is not None:
-        update_data["visaType"] = application_data.visaType.dict()
-    if application_data.personalInfo is not None:
-        update_data["personalInfo"] = application_data.personalInfo.dict()
-    if application_data.travelDetails is not None:
-        update_data["travelDetails"] = application_data.travelDetails.dict()
-    if application_data.passportInfo is not None:
-        update_data["passportInfo"] = application_data.passportInfo.dict()
-    if application_data.currentStep is not None:
-        update_data["currentStep"] = application_data.currentStep
-    if application_data.completedSteps is not None:
-        update_data["completedSteps"] = application_data.completedSteps
-    
+    update_data = build_update_delta(application_data)
     update_data["updatedAt"] = datetime.utcnow()
     
+    # Only apply the update on top of the version the client last saw, if given
+    query = {"_id": object_id, "userId": user_id}
+    expected_version = application_data.version
+    if if_match is not None:
+        expected_version = parse_if_match(if_match)
+    if expected_version is not None:
+        query["version"] = expected_version if expected_version > 0 else {"$exists": False}
+    
     # Update application
-    result = await db.visa_applications.update_one(
-        {"_id": object_id, "userId": user_id},
-        {"$set": update_data}
+    result = await db.visa_applications.find_one_and_update(
+        query,
+        {"$set": update_data, "$inc": {"version": 1}},
+        projection={"version": 1},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if result is None:
+        exists = expected_version is not None and await db.visa_applications.count_documents(
+            {"_id": object_id, "userId": user_id}, limit=1
+        )
+        if exists:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Application was modified by another session"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Application not found"
         )
     
-    return {
+    return json_response({
         "success": True,
+        "data": {"version": result["version"], "updatedAt": update_data["updatedAt"]},
         "message": "Application updated successfully"
-    }
+    }, headers={"ETag": f'"{result["version"]}"'})
 
 @router.post("/{application_id}/submit", response_model=dict)
 async def submit_application(
     application_id: str,
+    if_match: Optional[str] = Header(None),
     user_id: str = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
@@ -207,27 +555,132 @@ async def submit_application(
             detail="Invalid application ID format"
         )
     
-    # Update application status
-    result = await db.visa_applications.update_one(
-        {"_id": object_id, "userId": user_id, "status": ApplicationStatus.DRAFT},
+    # Only submit the version the client last saw, if given
+    query = {"_id": object_id, "userId": user_id, "status": ApplicationStatus.DRAFT}
+    expected_version = parse_if_match(if_match) if if_match is not None else None
+    if expected_version is not None:
+        query["version"] = expected_version if expected_version > 0 else {"$exists": False}
+    
+    # Update application status; the version bump makes edits based on the draft conflict
+    now = datetime.utcnow()
+    result = await db.visa_applications.find_one_and_update(
+        query,
         {
             "$set": {
                 "status": ApplicationStatus.SUBMITTED,
-                "submittedAt": datetime.utcnow(),
-                "updatedAt": datetime.utcnow()
-            }
-        }
+                "submittedAt": now,
+                "updatedAt": now
+            },
+            "$inc": {"version": 1}
+        },
+        projection={"version": 1},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if result is None:
+        exists = expected_version is not None and await db.visa_applications.count_documents(
+            {"_id": object_id, "userId": user_id, "status": ApplicationStatus.DRAFT}, limit=1
+        )
+        if exists:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Application was modified by another session"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Application not found or already submitted"
         )
+    await record_status_changes(db, [(user_id, ApplicationStatus.DRAFT, ApplicationStatus.SUBMITTED)])
     
-    return {
+    return json_response({
         "success": True,
+        "data": {"version": result["version"]},
         "message": "Application submitted successfully"
+    }, headers={"ETag": f'"{result["version"]}"'})
+
+@router.post("/{application_id}/documents", response_model=dict)
+async def attach_document(
+    application_id: str,
+    attachment: DocumentAttach,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Attach an uploaded document to a draft, replacing any document of the same type."""
+    
+    try:
+        object_id = ObjectId(application_id)
+        document_id = ObjectId(attachment.documentId)
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid application or document ID format"
+        )
+    
+    upload = await db.documents.find_one({"_id": document_id, "userId": user_id})
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    entry = Document(
+        type=upload["type"],
+        fileName=upload["fileName"],
+        fileUrl=f"/api/upload/documents/{attachment.documentId}",
+        documentId=attachment.documentId,
+        size=upload["size"],
+        sha256=upload["sha256"],
+        renditions=rendition_urls(attachment.documentId, upload["type"], upload["contentType"])
+    ).dict()
+    
+    # Take the reference before the application points at the blob
+    if not await retain_blob(db, entry["sha256"]):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Document file is no longer available, please upload it again"
+        )
+    
+    try:
+        replaced = await replace_documents(db, object_id, user_id, entry["type"], entry)
+    except HTTPException:
+        await release_blobs(db, [entry["sha256"]])
+        raise
+    await release_blobs(db, document_hashes(replaced))
+    
+    return {
+        "success": True,
+        "data": entry,
+        "message": "Document attached successfully"
+    }
+
+@router.delete("/{application_id}/documents/{document_type}", response_model=dict)
+async def detach_document(
+    application_id: str,
+    document_type: DocumentType,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Remove a document from a draft."""
+    
+    try:
+        object_id = ObjectId(application_id)
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid application ID format"
+        )
+    
+    removed = await replace_documents(db, object_id, user_id, document_type, None)
+    if not removed:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    await release_blobs(db, document_hashes(removed))
+    
+    return {
+        "success": True,
+        "message": "Document removed successfully"
     }
 
 @router.delete("/{application_id}", response_model=dict)
@@ -247,18 +700,24 @@ async def delete_application(
         )
     
     # Delete application (only if it's a draft)
-    result = await db.visa_applications.delete_one({
-        "_id": object_id,
-        "userId": user_id,
-        "status": ApplicationStatus.DRAFT
-    })
+    deleted = await db.visa_applications.find_one_and_delete(
+        {"_id": object_id, "userId": user_id, "status": ApplicationStatus.DRAFT},
+        projection={"documents.sha256": 1}
+    )
     
-    if result.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Application not found or cannot be deleted"
         )
     
+    # Drop the application's references to shared document blobs, and those of
+    # the user's uploads that nothing else uses, so unused files are collected
+    hashes = document_hashes(deleted.get("documents", []))
+    hashes += await release_unattached_uploads(db, user_id, hashes)
+    await release_blobs(db, hashes)
+    await record_status_changes(db, [(user_id, ApplicationStatus.DRAFT, None)])
+    
     return {
         "success": True,
         "message": "Application deleted successfully"
@@ -1,29 +1,95 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends, Response, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-import os
+import asyncio
 import logging
 from pathlib import Path
 
-# Import routes
-from routes import auth, visa_applications, countries, faqs
-
-# Load environment variables
+# Load environment variables before the modules below read their settings
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Import routes
+from routes import auth, visa_applications, countries, faqs, exports, uploads, analytics
+from routes.countries import load_countries, seed_countries
+from routes.faqs import load_faqs, seed_faqs
+from utils.auth import shutdown_password_pool, token_revocations
+from utils.indexes import ensure_indexes
+from utils.cache import cache_stats
+from utils.database import MongoSettings
+from utils.images import image_pipeline
+from utils.invalidation import cache_invalidation
+from utils.locks import run_once
+from utils.metrics import MetricsMiddleware, render_metrics
+from utils.ratelimit import RateLimitMiddleware
+from utils.resources import AppResources, get_resources
+from utils.search import faq_search_index
+from utils.summaries import run_reconciliation
+
+async def bootstrap(db):
+    """Create indexes and seed reference data; run by a single worker per startup."""
+    # Indexes come before seeding so unique constraints apply to seed data
+    await ensure_indexes(db)
+    await seed_countries(db)
+    await seed_faqs(db)
+
+async def warm_up(resources: AppResources):
+    """Prepare indexes, seed data, connections and caches, then mark the app ready."""
+    db = resources.db
+    
+    # Record cache versions before any cache is filled so later changes are not missed
+    await resources.run_step("cache_versions", cache_invalidation.sync(db))
+    
+    # Workers start together; one of them bootstraps while the others wait for it
+    await resources.run_step("bootstrap", run_once(db, "bootstrap", lambda: bootstrap(db)))
+    
+    # Open pooled connections and build caches so the first requests are not the slow ones;
+    # caches are filled from the primary so they never start out behind a lagging secondary
+    await asyncio.gather(
+        resources.run_step("connection_pool", resources.prefill_pool()),
+        resources.run_step("token_revocations", token_revocations.refresh(db)),
+        resources.run_step("countries_cache", load_countries(db)),
+        resources.run_step("faqs_cache", load_faqs(db)),
+        resources.run_step("faq_search_index", faq_search_index.refresh(db, force=True)),
+    )
+    
+    # Keep the dashboard counters honest and follow cache and token changes made by other workers
+    resources.start_task(run_reconciliation(lambda: resources.db))
+    resources.start_task(cache_invalidation.run(lambda: resources.db))
+    resources.start_task(token_revocations.run(lambda: resources.db))
+    resources.ready = True
+    total = sum(step["ms"] for step in resources.warmup.values())
+    logger.info(f"Warm-up finished ({total:.0f} ms of steps): {resources.warmup}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create per-process resources, warm them up, and release them on shutdown."""
+    logger.info("Starting up...")
+    resources = AppResources.connect(MongoSettings.from_env())
+    resources.on_shutdown(shutdown_password_pool)
+    resources.on_shutdown(image_pipeline.shutdown)
+    app.state.resources = resources
+    
+    # Serve /api/health right away; /api/ready reports when warm-up is done
+    resources.start_task(warm_up(resources))
+    try:
+        yield
+    finally:
+        await resources.close()
+        logger.info("Database connection closed")
 
 # Create the main app
-app = FastAPI(title="KPVS USA Visa API", version="1.0.0")
+app = FastAPI(title="KPVS USA Visa API", version="1.0.0", lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Throttle before routing so rejected requests never reach body parsing or bcrypt;
+# added first so it runs inside CORS (429s stay readable by browsers) and metrics
+app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +98,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Configure logging
 logging.basicConfig(
@@ -46,10 +113,10 @@ async def root():
     return {"message": "KPVS USA Visa API is running", "status": "healthy"}
 
 @api_router.get("/health")
-async def health_check():
+async def health_check(resources: AppResources = Depends(get_resources)):
     try:
         # Test database connection
-        await db.command("ping")
+        await resources.ping()
         return {
             "status": "healthy",
             "database": "connected",
@@ -63,38 +130,64 @@ async def health_check():
             "error": str(e)
         }
 
+@api_router.get("/ready")
+async def readiness_check(response: Response, resources: AppResources = Depends(get_resources)):
+    """Readiness probe: 200 once warm-up has finished and the database answers."""
+    try:
+        await resources.ping()
+        database = "connected"
+    except Exception as e:
+        database = f"unavailable: {e}"
+    
+    if database != "connected":
+        state = "unavailable"
+    else:
+        state = "ready" if resources.ready else "starting"
+    if state != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": state,
+        "database": database,
+        "warmup": resources.warmup
+    }
+
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    return {
+        "success": True,
+        "data": cache_stats(),
+        "message": "Cache statistics retrieved successfully"
+    }
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Include routers
 api_router.include_router(auth.router)
 api_router.include_router(visa_applications.router)
 api_router.include_router(countries.router)
 api_router.include_router(faqs.router)
+api_router.include_router(exports.router)
+api_router.include_router(uploads.router)
+api_router.include_router(analytics.router)
 
 # Include the API router in the main app
 app.include_router(api_router)
 
-@app.on_event("startup")
-async def startup_db_client():
-    """Initialize database and seed data."""
-    logger.info("Starting up...")
-    
-    # Seed data
-    try:
-        from routes.countries import seed_countries
-        from routes.faqs import seed_faqs
-        
-        await seed_countries(db)
-        await seed_faqs(db)
-        
-        logger.info("Database seeded successfully")
-    except Exception as e:
-        logger.error(f"Error seeding database: {e}")
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    """Close database connection."""
-    client.close()
-    logger.info("Database connection closed")
-
 if __name__ == "__main__":
+    import argparse
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    
+    parser = argparse.ArgumentParser(description="Run the API server.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8001")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        help="worker processes, each with its own event loop and Mongo client (default: one per core)"
+    )
+    args = parser.parse_args()
+    
+    # Workers import the app themselves, so it is passed by import string
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers, app_dir=str(ROOT_DIR))
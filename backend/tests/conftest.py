@@ -0,0 +1,63 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# The rate limiter has its own tests; every other test runs unthrottled
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import server  # noqa: E402
+from routes.countries import seed_countries  # noqa: E402
+from routes.faqs import seed_faqs  # noqa: E402
+from utils.auth import create_access_token  # noqa: E402
+from utils.cache import _caches  # noqa: E402
+from utils.invalidation import cache_invalidation  # noqa: E402
+from utils.resources import AppResources  # noqa: E402
+from utils.search import faq_search_index  # noqa: E402
+
+
+@asynccontextmanager
+async def app_client(seed: bool = True, app=None):
+    """Yield an httpx client bound to the app, backed by a fresh in-memory database."""
+    mongo_client = AsyncMongoMockClient()
+    db = mongo_client["test"]
+    server.app.state.resources = AppResources(mongo_client, db)
+    if seed:
+        await seed_countries(db)
+        await seed_faqs(db)
+    transport = httpx.ASGITransport(app=app or server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    """Every test gets its own database, so in-process caches must start empty too."""
+    for cache in _caches.values():
+        cache.invalidate()
+    faq_search_index.invalidate()
+    monkeypatch.setattr(cache_invalidation, "_seen", {})
+    monkeypatch.setattr(cache_invalidation, "_synced", False)
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine taking an httpx client bound to the app and a fresh, seeded database.
+
+    app wraps the application, e.g. in middleware under test.
+    """
+    def runner(scenario, seed: bool = True, app=None):
+        async def main():
+            async with app_client(seed=seed, app=app) as client:
+                return await scenario(client, server.app.state.resources.db)
+        return asyncio.run(main())
+    return runner
+
+
+@pytest.fixture
+def admin_headers():
+    token = create_access_token({"sub": "000000000000000000000001", "role": "admin"})
+    return {"Authorization": f"Bearer {token}"}
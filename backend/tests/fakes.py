@@ -0,0 +1,81 @@
+"""In-memory stand-ins for the parts of MongoDB that mongomock-motor lacks."""
+
+import asyncio
+
+WRITE_METHODS = {
+    "insert_one": "insert",
+    "insert_many": "insert",
+    "update_one": "update",
+    "update_many": "update",
+    "replace_one": "replace",
+    "delete_one": "delete",
+    "delete_many": "delete",
+}
+
+class FakeChangeStream:
+    """An async change stream fed by FakeStreamDatabase writes."""
+
+    def __init__(self, source: "FakeStreamDatabase", pipeline: list):
+        self.source = source
+        self.collections = None
+        for stage in pipeline:
+            match = stage.get("$match", {}).get("ns.coll", {})
+            if "$in" in match:
+                self.collections = set(match["$in"])
+        self.queue = asyncio.Queue()
+
+    async def __aenter__(self):
+        self.source.streams.append(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.source.streams.remove(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    def push(self, change: dict):
+        if self.collections is None or change["ns"]["coll"] in self.collections:
+            self.queue.put_nowait(change)
+
+class FakeStreamCollection:
+    """Collection wrapper reporting writes to the open change streams."""
+
+    def __init__(self, source: "FakeStreamDatabase", collection):
+        self._source = source
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in WRITE_METHODS:
+            return attribute
+
+        async def write(*args, **kwargs):
+            result = await attribute(*args, **kwargs)
+            change = {"operationType": WRITE_METHODS[name], "ns": {"db": self._source.name, "coll": self._collection.name}}
+            for stream in list(self._source.streams):
+                stream.push(change)
+            return result
+        return write
+
+class FakeStreamDatabase:
+    """In-memory database whose watch() reports writes made through it."""
+
+    def __init__(self, db):
+        self._db = db
+        self.name = db.name
+        self.streams = []
+
+    def watch(self, pipeline=None, **kwargs):
+        return FakeChangeStream(self, pipeline or [])
+
+    def __getitem__(self, name):
+        return FakeStreamCollection(self, self._db[name])
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
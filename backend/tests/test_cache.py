@@ -0,0 +1,55 @@
+from routes.countries import countries_cache
+from routes.faqs import faqs_cache
+
+
+def test_countries_answer_304_for_matching_etag(run):
+    async def scenario(client, db):
+        first = await client.get("/api/countries")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "no-cache"
+
+        cached = await client.get("/api/countries", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+        # Any of several listed tags may match
+        listed = await client.get("/api/countries", headers={"If-None-Match": f'"stale", {etag}'})
+        assert listed.status_code == 304
+
+        other = await client.get("/api/countries", headers={"If-None-Match": '"stale"'})
+        assert other.status_code == 200
+        assert other.json() == first.json()
+    run(scenario)
+
+
+def test_faq_etag_changes_after_invalidation(run):
+    async def scenario(client, db):
+        first = await client.get("/api/faqs", params={"category": "General Information"})
+        etag = first.headers["etag"]
+        assert faqs_cache.stats()["entries"] == 1
+
+        faqs_cache.invalidate()
+        refreshed = await client.get("/api/faqs", params={"category": "general information"}, headers={"If-None-Match": etag})
+        assert refreshed.status_code == 200
+        assert refreshed.headers["etag"] != etag
+        assert refreshed.json() == first.json()
+    run(scenario)
+
+
+def test_country_lookup_is_cached_per_code(run):
+    async def scenario(client, db):
+        first = await client.get("/api/countries/us")
+        assert first.status_code == 200
+        assert first.json()["data"]["code"] == "US"
+
+        # Served from memory even once the row is gone, until the cache is invalidated
+        await db.countries.delete_one({"code": "US"})
+        cached = await client.get("/api/countries/US", headers={"If-None-Match": first.headers["etag"]})
+        assert cached.status_code == 304
+
+        countries_cache.invalidate()
+        missing = await client.get("/api/countries/US")
+        assert missing.status_code == 404
+    run(scenario)
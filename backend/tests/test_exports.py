@@ -0,0 +1,99 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from utils.export import EXPORT_COLUMNS
+
+EXPORT_URL = "/api/admin/exports/visa-applications"
+
+
+async def insert_applications(db) -> list:
+    """Insert applications whose creation order differs from their _id order; returns ids in creation order."""
+    start = datetime(2024, 3, 1, 9, 0)
+    ids = [ObjectId() for _ in range(5)]
+    created = [start + timedelta(hours=h) for h in (4, 1, 3, 1, 0)]
+    await db.visa_applications.insert_many([
+        {
+            "_id": object_id,
+            "userId": f"user-{i}",
+            "applicationNumber": f"USA-20240301-{i:06d}",
+            "status": "submitted" if i % 2 else "draft",
+            "personalInfo": {"fullName": f"Applicant {i}", "citizenship": "IN"},
+            "documents": [{"documentId": "a"}, {"documentId": "b"}][:i],
+            "completedSteps": [1, 2],
+            "currentStep": 3,
+            "createdAt": created_at,
+            "updatedAt": created_at,
+        }
+        for i, (object_id, created_at) in enumerate(zip(ids, created))
+    ])
+    # Creation time, then _id for ties
+    return [str(object_id) for _, object_id in sorted(zip(created, ids))]
+
+
+def test_export_streams_rows_in_creation_order(run, admin_headers):
+    async def scenario(client, db):
+        expected = await insert_applications(db)
+
+        response = await client.get(EXPORT_URL, headers={**admin_headers, "Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == expected
+        first = rows[0]
+        assert list(first) == EXPORT_COLUMNS
+        assert first["personalInfo.fullName"] == "Applicant 4"
+        assert first["createdAt"] == "2024-03-01T09:00:00"
+        assert first["completedSteps"] == "1;2"
+        assert {row["id"]: row["documentCount"] for row in rows}[expected[-1]] == 0
+    run(scenario, seed=False)
+
+
+def test_export_filters_and_formats_csv(run, admin_headers):
+    async def scenario(client, db):
+        expected = await insert_applications(db)
+
+        response = await client.get(EXPORT_URL, headers={**admin_headers, "Accept-Encoding": "identity"}, params={
+            "format": "csv",
+            "status": "submitted",
+            "created_from": "2024-03-01T10:00:00",
+        })
+        assert response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        # The two submitted applications were created together at 10:00, so _id breaks the tie
+        assert [row["id"] for row in rows] == expected[1:3]
+        assert {row["status"] for row in rows} == {"submitted"}
+        assert {row["createdAt"] for row in rows} == {"2024-03-01T10:00:00"}
+    run(scenario, seed=False)
+
+
+def test_export_gzips_when_accepted(run, admin_headers):
+    async def scenario(client, db):
+        expected = await insert_applications(db)
+
+        # Read the raw stream so the body arrives still compressed
+        async with client.stream("GET", EXPORT_URL, headers={**admin_headers, "Accept-Encoding": "gzip"}) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.headers["vary"] == "Accept-Encoding"
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+        rows = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+        assert [row["id"] for row in rows] == expected
+    run(scenario, seed=False)
+
+
+def test_export_requires_admin(run):
+    async def scenario(client, db):
+        registered = await client.post("/api/auth/register", json={
+            "fullName": "Ann Bee", "email": "ann@example.com", "password": "secret12"
+        })
+        token = registered.json()["data"]["access_token"]
+        response = await client.get(EXPORT_URL, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 403
+    run(scenario, seed=False)
@@ -0,0 +1,77 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+
+from utils import images, storage
+from utils.images import failure_marker, image_pipeline
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), (200, 10, 10)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def pipeline(tmp_path, monkeypatch):
+    """Store uploads under tmp_path and render in a thread so render_renditions can be patched."""
+    monkeypatch.setattr(storage, "UPLOAD_DIR", tmp_path)
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(image_pipeline, "_executor", executor)
+    yield
+    executor.shutdown(wait=True)
+
+
+async def upload_photo(client, content: bytes) -> tuple:
+    registered = await client.post("/api/auth/register", json={
+        "fullName": "Ann Bee", "email": "ann@example.com", "password": "secret12"
+    })
+    headers = {"Authorization": f"Bearer {registered.json()['data']['access_token']}"}
+    response = await client.post(
+        "/api/upload/documents", params={"type": "photo"}, headers=headers,
+        files={"file": ("photo.png", content, "image/png")}
+    )
+    assert response.status_code == 201
+    return response.json()["data"], headers
+
+
+def test_transient_render_failure_is_retried(run, monkeypatch):
+    render = images.render_renditions
+
+    def out_of_space(source, target_dir):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(images, "render_renditions", out_of_space)
+
+    async def scenario(client, db):
+        document, headers = await upload_photo(client, png_bytes())
+        url = document["renditions"]["thumbnail"]
+
+        failed = await client.get(url, headers=headers)
+        assert failed.status_code == 422
+        assert not failure_marker(document["sha256"]).exists()
+
+        monkeypatch.setattr(images, "render_renditions", render)
+        retried = await client.get(url, headers={**headers, "Accept": "image/webp"})
+        assert retried.status_code == 200
+        assert retried.headers["content-type"] == "image/webp"
+    run(scenario, seed=False)
+
+
+def test_undecodable_image_is_remembered(run, monkeypatch):
+    async def scenario(client, db):
+        document, headers = await upload_photo(client, b"\x89PNG\r\n\x1a\n not really an image")
+        url = document["renditions"]["thumbnail"]
+
+        assert (await client.get(url, headers=headers)).status_code == 422
+        assert failure_marker(document["sha256"]).exists()
+
+        # Later requests fail fast without rendering again
+        def unexpected(source, target_dir):
+            raise AssertionError("rendered again")
+
+        monkeypatch.setattr(images, "render_renditions", unexpected)
+        assert (await client.get(url, headers=headers)).status_code == 422
+    run(scenario, seed=False)
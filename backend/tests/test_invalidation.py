@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime
+
+from tests.fakes import FakeStreamDatabase
+from utils.invalidation import InvalidationChannel, cache_invalidation
+
+NEW_FAQ = {
+    "question": "Can I extend my stay with a tourist visa?",
+    "answer": "Extensions are requested from immigration authorities before the visa expires.",
+    "category": "General Information",
+    "isActive": True,
+    "order": 0,
+    "createdAt": datetime(2024, 1, 1),
+    "updatedAt": datetime(2024, 1, 1),
+}
+
+
+def questions(response) -> list:
+    return [faq["question"] for faq in response.json()["data"]]
+
+
+def test_poll_drops_cache_after_another_worker_writes(run):
+    async def scenario(client, db):
+        # As at startup: versions are recorded before the caches are filled
+        await cache_invalidation.sync(db)
+        before = await client.get("/api/faqs")
+        assert NEW_FAQ["question"] not in questions(before)
+
+        # Another worker changes FAQs and announces it through its own channel
+        other_worker = InvalidationChannel()
+        await db.faqs.insert_one(dict(NEW_FAQ))
+        await other_worker.publish(db, "faqs")
+
+        # Until this worker polls, it keeps serving its cached listing
+        stale = await client.get("/api/faqs", headers={"If-None-Match": before.headers["etag"]})
+        assert stale.status_code == 304
+
+        assert await cache_invalidation.sync(db) == ["faqs"]
+        after = await client.get("/api/faqs", headers={"If-None-Match": before.headers["etag"]})
+        assert after.status_code == 200
+        assert NEW_FAQ["question"] in questions(after)
+
+        search = await client.get("/api/faqs/search", params={"q": "extend stay"})
+        assert search.json()["data"][0]["question"] == NEW_FAQ["question"]
+
+        # Applied once; the next poll finds nothing new
+        assert await cache_invalidation.sync(db) == []
+    run(scenario)
+
+
+def test_change_stream_drops_cache_after_direct_write(run, monkeypatch):
+    async def scenario(client, db):
+        monkeypatch.setattr(cache_invalidation, "mode", "starting")
+        stream_db = FakeStreamDatabase(db)
+        watcher = asyncio.create_task(cache_invalidation.watch(stream_db))
+        try:
+            while cache_invalidation.mode != "changestream":
+                await asyncio.sleep(0.01)
+            before = await client.get("/api/countries")
+
+            # A write made outside the API, with no publish()
+            await stream_db.countries.update_one({"code": "US"}, {"$set": {"name": "United States of America"}})
+            for _ in range(100):
+                after = await client.get("/api/countries", headers={"If-None-Match": before.headers["etag"]})
+                if after.status_code == 200:
+                    break
+                await asyncio.sleep(0.01)
+            assert after.status_code == 200
+            names = {country["code"]: country["name"] for country in after.json()["data"]}
+            assert names["US"] == "United States of America"
+        finally:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+    run(scenario)
@@ -0,0 +1,75 @@
+import pytest
+
+import server
+from utils import ratelimit
+from utils.ratelimit import RateLimitMiddleware, RateLimitPolicy, TokenBuckets
+
+LOGIN = {"email": "nobody@example.com", "password": "wrong-password"}
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    """The app behind an enabled limiter with empty buckets."""
+    monkeypatch.setattr(ratelimit, "memory_buckets", TokenBuckets())
+    return RateLimitMiddleware(server.app, enabled=True, backend="memory")
+
+
+async def register(client, email: str) -> dict:
+    response = await client.post("/api/auth/register", json={
+        "fullName": "Ann Bee", "email": email, "password": "secret12"
+    })
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+def test_login_is_throttled_with_retry_after(run, limited_app):
+    async def scenario(client, db):
+        burst = ratelimit.LOGIN_POLICY.burst
+        for _ in range(burst):
+            response = await client.post("/api/auth/login", json=LOGIN)
+            assert response.status_code == 401
+
+        throttled = await client.post("/api/auth/login", json=LOGIN)
+        assert throttled.status_code == 429
+        assert throttled.json() == {"detail": "Too many requests, please retry later"}
+        # One token comes back every 60 / burst seconds
+        assert 1 <= int(throttled.headers["retry-after"]) <= 60 / burst + 1
+    run(scenario, seed=False, app=limited_app)
+
+
+def test_clients_behind_a_proxy_get_their_own_buckets(run, limited_app, monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_PROXY_HOPS", 1)
+
+    async def scenario(client, db):
+        first = {"X-Forwarded-For": "203.0.113.7"}
+        for _ in range(ratelimit.LOGIN_POLICY.burst):
+            await client.post("/api/auth/login", json=LOGIN, headers=first)
+        assert (await client.post("/api/auth/login", json=LOGIN, headers=first)).status_code == 429
+
+        # Same proxy connection, different client
+        second = {"X-Forwarded-For": "198.51.100.4"}
+        assert (await client.post("/api/auth/login", json=LOGIN, headers=second)).status_code == 401
+    run(scenario, seed=False, app=limited_app)
+
+
+def test_writes_are_limited_per_user(run, limited_app, monkeypatch):
+    user_policy = RateLimitPolicy("writes_user", "user", rate=0.001, burst=3)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_RULES", [
+        (ratelimit.WRITE_METHODS, "/api/visa-applications", user_policy),
+    ])
+
+    async def scenario(client, db):
+        ann = await register(client, "ann@example.com")
+        bob = await register(client, "bob@example.com")
+
+        for _ in range(user_policy.burst):
+            assert (await client.post("/api/visa-applications", json={}, headers=ann)).status_code == 200
+        throttled = await client.post("/api/visa-applications", json={}, headers=ann)
+        assert throttled.status_code == 429
+        assert int(throttled.headers["retry-after"]) >= 1
+
+        # Another user from the same address has a bucket of their own
+        assert (await client.post("/api/visa-applications", json={}, headers=bob)).status_code == 200
+        # Anonymous requests are not charged to any user bucket
+        assert (await client.post("/api/visa-applications", json={})).status_code in (401, 403)
+        assert await db.visa_applications.count_documents({}) == user_policy.burst + 1
+    run(scenario, seed=False, app=limited_app)
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from utils import storage
+from utils.storage import blob_path
+
+PDF = ("statement.pdf", b"%PDF-1.4 the same statement", "application/pdf")
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+async def register(client, email: str) -> dict:
+    response = await client.post("/api/auth/register", json={
+        "fullName": "Ann Bee", "email": email, "password": "secret12"
+    })
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+async def upload(client, headers: dict) -> dict:
+    response = await client.post(
+        "/api/upload/documents", params={"type": "bank_statement"}, headers=headers, files={"file": PDF}
+    )
+    assert response.status_code == 201
+    return response.json()["data"]
+
+
+async def draft_with(client, headers: dict, document_id: str) -> str:
+    application_id = (await client.post("/api/visa-applications", json={}, headers=headers)).json()["data"]["application_id"]
+    attached = await client.post(
+        f"/api/visa-applications/{application_id}/documents", json={"documentId": document_id}, headers=headers
+    )
+    assert attached.status_code == 200
+    return application_id
+
+
+def test_deleting_a_draft_collects_its_unshared_blob(run):
+    async def scenario(client, db):
+        ann = await register(client, "ann@example.com")
+        document = await upload(client, ann)
+        application_id = await draft_with(client, ann, document["document_id"])
+        assert (await db.blobs.find_one({"_id": document["sha256"]}))["refCount"] == 2
+
+        deleted = await client.delete(f"/api/visa-applications/{application_id}", headers=ann)
+        assert deleted.status_code == 200
+        assert await db.blobs.find_one({"_id": document["sha256"]}) is None
+        assert await db.documents.count_documents({}) == 0
+        assert not blob_path(document["sha256"]).exists()
+    run(scenario, seed=False)
+
+
+def test_deleting_a_draft_keeps_content_another_user_uploaded(run):
+    async def scenario(client, db):
+        ann = await register(client, "ann@example.com")
+        bob = await register(client, "bob@example.com")
+        anns = await upload(client, ann)
+        bobs = await upload(client, bob)
+        assert anns["sha256"] == bobs["sha256"]
+
+        application_id = await draft_with(client, bob, bobs["document_id"])
+        assert (await client.delete(f"/api/visa-applications/{application_id}", headers=bob)).status_code == 200
+
+        # Bob's upload went with his draft; Ann's upload of the same file is untouched
+        assert (await client.get(f"/api/upload/documents/{bobs['document_id']}", headers=bob)).status_code == 404
+        download = await client.get(f"/api/upload/documents/{anns['document_id']}", headers=ann)
+        assert download.status_code == 200
+        assert download.content == PDF[1]
+        assert (await db.blobs.find_one({"_id": anns["sha256"]}))["refCount"] == 1
+
+        # Ann can still use it, and it is collected once her last reference is gone
+        application_id = await draft_with(client, ann, anns["document_id"])
+        assert (await client.delete(f"/api/visa-applications/{application_id}", headers=ann)).status_code == 200
+        assert await db.blobs.find_one({"_id": anns["sha256"]}) is None
+        assert not blob_path(anns["sha256"]).exists()
+    run(scenario, seed=False)
+
+
+def test_an_upload_attached_elsewhere_survives_a_draft_delete(run):
+    async def scenario(client, db):
+        ann = await register(client, "ann@example.com")
+        document = await upload(client, ann)
+        first = await draft_with(client, ann, document["document_id"])
+        await draft_with(client, ann, document["document_id"])
+
+        assert (await client.delete(f"/api/visa-applications/{first}", headers=ann)).status_code == 200
+        assert (await client.get(f"/api/upload/documents/{document['document_id']}", headers=ann)).status_code == 200
+        assert (await db.blobs.find_one({"_id": document["sha256"]}))["refCount"] == 2
+    run(scenario, seed=False)
+
+
+def test_upload_waits_for_a_collection_in_progress(run, monkeypatch):
+    monkeypatch.setattr(storage, "BLOB_COLLECT_POLL_SECONDS", 0.01)
+
+    async def scenario(client, db):
+        ann = await register(client, "ann@example.com")
+        document = await upload(client, ann)
+        sha256 = document["sha256"]
+        # Another request has claimed the blob for collection but not removed it yet
+        await db.blobs.update_one({"_id": sha256}, {"$set": {"refCount": 0, "collectingAt": datetime.utcnow()}})
+        pending = asyncio.create_task(upload(client, ann))
+        await asyncio.sleep(0.05)
+        assert not pending.done()
+
+        blob_path(sha256).unlink()
+        await db.blobs.delete_one({"_id": sha256})
+        again = await pending
+        assert (await db.blobs.find_one({"_id": sha256}))["refCount"] == 1
+        assert blob_path(sha256).read_bytes() == PDF[1]
+        assert (await client.get(f"/api/upload/documents/{again['document_id']}", headers=ann)).status_code == 200
+    run(scenario, seed=False)
@@ -0,0 +1,236 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from models.visa_application import ApplicationStatus
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from pymongoarrow.api import Schema, aggregate_pandas_all
+except ImportError:  # pymongoarrow is optional; batches are decoded into DataFrames instead
+    aggregate_pandas_all = None
+
+logger = logging.getLogger(__name__)
+
+# Analytics configuration
+ANALYTICS_BATCH_SIZE = int(os.environ.get("ANALYTICS_BATCH_SIZE", "50000"))
+ANALYTICS_CACHE_TTL = float(os.environ.get("ANALYTICS_CACHE_TTL", "600"))
+APPLICATION_STEPS = int(os.environ.get("APPLICATION_STEPS", "5"))
+TOP_VALUES = 50
+
+# Look-back windows, in days; windows end at the start of the next UTC day
+ANALYTICS_WINDOWS = {"7d": 7, "30d": 30, "90d": 90, "365d": 365, "all": None}
+
+# Time-to-submit histogram edges in seconds
+SUBMIT_BUCKETS = [
+    ("<1h", 0), ("1-6h", 3600), ("6-24h", 6 * 3600), ("1-3d", 86400),
+    ("3-7d", 3 * 86400), ("7-30d", 7 * 86400), (">30d", 30 * 86400),
+]
+SUBMIT_PERCENTILES = (50, 75, 90, 95, 99)
+
+SNAPSHOT_COLUMNS = ["status", "createdAt", "step", "submitSeconds", "citizenship", "visaType"]
+
+def snapshot_pipeline(start: Optional[datetime], end: datetime) -> List[dict]:
+    """Aggregation projecting each application down to the analysed columns."""
+    match = {"createdAt": {"$lt": end}}
+    if start is not None:
+        match["createdAt"]["$gte"] = start
+    return [
+        {"$match": match},
+        {"$project": {
+            "_id": 0,
+            "status": 1,
+            "createdAt": 1,
+            # Furthest wizard step reached, from either progress field
+            "step": {"$max": [
+                {"$ifNull": ["$currentStep", 1]},
+                {"$max": {"$ifNull": ["$completedSteps", []]}}
+            ]},
+            "submitSeconds": {"$cond": [
+                {"$gt": ["$submittedAt", None]},
+                {"$divide": [{"$subtract": ["$submittedAt", "$createdAt"]}, 1000]},
+                None
+            ]},
+            "citizenship": {"$ifNull": ["$personalInfo.citizenship", None]},
+            "visaType": {"$ifNull": ["$visaType.id", None]},
+        }},
+    ]
+
+def _columnar(frame: pd.DataFrame) -> pd.DataFrame:
+    """Convert a decoded batch to compact typed columns."""
+    return pd.DataFrame({
+        "status": frame["status"].astype("category"),
+        "createdAt": pd.to_datetime(frame["createdAt"]),
+        "step": pd.to_numeric(frame["step"], errors="coerce").fillna(1).astype(np.int16),
+        "submitSeconds": pd.to_numeric(frame["submitSeconds"], errors="coerce").astype(np.float64),
+        "citizenship": frame["citizenship"].astype("category"),
+        "visaType": frame["visaType"].astype("category"),
+    })
+
+async def load_snapshot(db: AsyncIOMotorDatabase, start: Optional[datetime], end: datetime) -> pd.DataFrame:
+    """Pull the projected columns for applications created in [start, end)."""
+    pipeline = snapshot_pipeline(start, end)
+    
+    # Arrow decodes straight into columns when pymongoarrow and a real server are available
+    collection = getattr(db.visa_applications, "delegate", None)
+    if aggregate_pandas_all is not None and collection is not None:
+        schema = Schema({
+            "status": str, "createdAt": datetime, "step": int,
+            "submitSeconds": float, "citizenship": str, "visaType": str,
+        })
+        frame = await asyncio.to_thread(aggregate_pandas_all, collection, pipeline, schema=schema)
+        return _columnar(frame)
+    
+    # Otherwise convert each batch as it arrives so only one batch is held as dicts
+    frames = []
+    batch = []
+    async for row in db.visa_applications.aggregate(pipeline, batchSize=ANALYTICS_BATCH_SIZE):
+        batch.append(row)
+        if len(batch) >= ANALYTICS_BATCH_SIZE:
+            frames.append(_columnar(pd.DataFrame.from_records(batch, columns=SNAPSHOT_COLUMNS)))
+            batch = []
+    if batch or not frames:
+        frames.append(_columnar(pd.DataFrame.from_records(batch, columns=SNAPSHOT_COLUMNS)))
+    # Batches have different categories, so concat yields objects that are re-encoded once
+    frame = pd.concat(frames, ignore_index=True)
+    for column in ("status", "citizenship", "visaType"):
+        frame[column] = frame[column].astype("category")
+    return frame
+
+def compute_funnel(frame: pd.DataFrame) -> dict:
+    """Applications reaching each wizard step, with drop-off between steps."""
+    steps = max(APPLICATION_STEPS, int(frame["step"].max()) if len(frame) else 0)
+    categories = frame["status"].cat.categories
+    codes = frame["status"].cat.codes.to_numpy()
+    draft = categories.get_loc(ApplicationStatus.DRAFT.value) if ApplicationStatus.DRAFT.value in categories else -2
+    is_submitted = (codes != draft) & (codes != -1)
+    # Anything past draft went through every step, whatever its progress fields say
+    furthest = np.where(is_submitted, steps, np.clip(frame["step"].to_numpy(), 1, steps))
+    reached = np.bincount(furthest, minlength=steps + 1)[1:][::-1].cumsum()[::-1]
+    total = len(frame)
+    submitted = int(is_submitted.sum())
+    
+    stages = []
+    previous = total
+    for step, count in enumerate(reached.tolist(), start=1):
+        stages.append({
+            "step": step,
+            "reached": count,
+            "dropOff": previous - count,
+            "conversion": round(count / total, 4) if total else 0.0,
+        })
+        previous = count
+    stages.append({
+        "step": "submitted",
+        "reached": submitted,
+        "dropOff": previous - submitted,
+        "conversion": round(submitted / total, 4) if total else 0.0,
+    })
+    return {"total": total, "stages": stages}
+
+def compute_time_to_submit(frame: pd.DataFrame) -> dict:
+    """Distribution of the time from creation to submission."""
+    seconds = frame["submitSeconds"].to_numpy()
+    # NaN (never submitted) fails the comparison, so one mask drops both cases
+    seconds = seconds[seconds >= 0]
+    if not len(seconds):
+        return {"count": 0, "meanHours": None, "percentilesHours": {}, "histogram": []}
+    
+    edges = [edge for _, edge in SUBMIT_BUCKETS] + [np.inf]
+    counts, _ = np.histogram(seconds, bins=edges)
+    percentiles = np.percentile(seconds, SUBMIT_PERCENTILES) / 3600
+    return {
+        "count": int(len(seconds)),
+        "meanHours": round(float(seconds.mean()) / 3600, 2),
+        "percentilesHours": {f"p{p}": round(value, 2) for p, value in zip(SUBMIT_PERCENTILES, percentiles.tolist())},
+        "histogram": [{"bucket": label, "count": count} for (label, _), count in zip(SUBMIT_BUCKETS, counts.tolist())],
+    }
+
+def _counts(series: pd.Series, limit: int = TOP_VALUES) -> List[dict]:
+    """Most frequent values of a categorical column, counting missing values as None."""
+    # bincount over the category codes; code -1 (missing) lands in slot 0
+    counts = np.bincount(series.cat.codes.to_numpy() + 1, minlength=len(series.cat.categories) + 1)
+    values = [None] + series.cat.categories.tolist()
+    order = np.argsort(-counts, kind="stable")[:limit]
+    return [{"value": values[i], "count": int(counts[i])} for i in order if counts[i]]
+
+def compute_volume(frame: pd.DataFrame) -> dict:
+    """Application volume by citizenship, visa type, status and creation day."""
+    by_day = []
+    if len(frame):
+        days = frame["createdAt"].to_numpy().astype("datetime64[s]").view(np.int64) // 86400
+        first = int(days.min())
+        daily = np.bincount(days - first)
+        by_day = [
+            {"date": str(np.datetime64(first + offset, "D")), "count": count}
+            for offset, count in enumerate(daily.tolist()) if count
+        ]
+    return {
+        "total": len(frame),
+        "byCitizenship": _counts(frame["citizenship"]),
+        "byVisaType": _counts(frame["visaType"]),
+        "byStatus": _counts(frame["status"]),
+        "byDay": by_day,
+    }
+
+def compute_reports(frame: pd.DataFrame) -> Dict[str, dict]:
+    return {
+        "funnel": compute_funnel(frame),
+        "time-to-submit": compute_time_to_submit(frame),
+        "volume": compute_volume(frame),
+    }
+
+def window_bounds(window: str, now: Optional[datetime] = None) -> tuple:
+    """(start, end) of a window; aligned to UTC days so results can be reused all day."""
+    now = now or datetime.utcnow()
+    end = datetime(now.year, now.month, now.day) + timedelta(days=1)
+    days = ANALYTICS_WINDOWS[window]
+    return (end - timedelta(days=days) if days else None), end
+
+class AnalyticsCache:
+    """Per-window report cache; concurrent requests for a window share one computation."""
+    
+    def __init__(self, ttl: float = ANALYTICS_CACHE_TTL):
+        self.ttl = ttl
+        self._reports: Dict[str, tuple] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    async def get(self, db: AsyncIOMotorDatabase, window: str) -> dict:
+        """Return (and compute if stale) every report for the window."""
+        cached = self._reports.get(window)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        lock = self._locks.setdefault(window, asyncio.Lock())
+        async with lock:
+            cached = self._reports.get(window)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            
+            start_time = time.perf_counter()
+            start, end = window_bounds(window)
+            frame = await load_snapshot(db, start, end)
+            loaded = time.perf_counter()
+            reports = await asyncio.to_thread(compute_reports, frame)
+            reports["window"] = {
+                "name": window,
+                "from": start,
+                "to": end,
+                "computedAt": datetime.utcnow(),
+            }
+            logger.info(
+                f"Analytics for {window} over {len(frame)} applications: "
+                f"load {(loaded - start_time) * 1000:.0f} ms, compute {(time.perf_counter() - loaded) * 1000:.0f} ms"
+            )
+            self._reports[window] = (time.monotonic() + self.ttl, reports)
+            return reports
+    
+    def invalidate(self):
+        self._reports.clear()
+
+analytics_cache = AnalyticsCache()
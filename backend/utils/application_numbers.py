@@ -0,0 +1,94 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from datetime import datetime
+from typing import List
+import asyncio
+import os
+import string
+
+# Numbers reserved from the shared counter per round trip, per worker
+APPLICATION_NUMBER_BLOCK_SIZE = int(os.environ.get("APPLICATION_NUMBER_BLOCK_SIZE", "20"))
+
+# Format: USA-YYYYMMDD-SSSSSSC, a base-36 daily sequence plus a check character
+ALPHABET = string.digits + string.ascii_uppercase
+SEQUENCE_WIDTH = 6  # 36^6 - 1, about 2.18 billion numbers per day
+
+def _to_base36(value: int, width: int) -> str:
+    digits = []
+    while value:
+        value, remainder = divmod(value, 36)
+        digits.append(ALPHABET[remainder])
+    return "".join(reversed(digits)).rjust(width, "0")
+
+def check_character(payload: str) -> str:
+    """Luhn mod 36 check character, catching single typos and adjacent swaps."""
+    factor = 2
+    total = 0
+    for char in reversed(payload):
+        addend = factor * ALPHABET.index(char)
+        factor = 1 if factor == 2 else 2
+        total += addend // 36 + addend % 36
+    return ALPHABET[(36 - total % 36) % 36]
+
+def format_application_number(day: str, sequence: int) -> str:
+    """Build an application number from a YYYYMMDD day and a sequence value."""
+    payload = day + _to_base36(sequence, SEQUENCE_WIDTH)
+    return f"USA-{day}-{payload[len(day):]}{check_character(payload)}"
+
+def is_valid_application_number(number: str) -> bool:
+    """Check the format and check character of an application number."""
+    parts = number.upper().split("-")
+    if len(parts) != 3 or parts[0] != "USA" or len(parts[2]) != SEQUENCE_WIDTH + 1:
+        return False
+    if not parts[1].isdigit() or any(char not in ALPHABET for char in parts[2]):
+        return False
+    payload = parts[1] + parts[2][:-1]
+    return check_character(payload) == parts[2][-1]
+
+class ApplicationNumberAllocator:
+    """Hands out unique application numbers from blocks of an atomic per-day counter.
+    
+    Each worker reserves a block with one find_one_and_update/$inc and serves
+    numbers from it locally, so uniqueness needs no read-before-write. Numbers
+    left over in a block when a worker stops are skipped, never reused.
+    """
+    
+    def __init__(self, block_size: int = APPLICATION_NUMBER_BLOCK_SIZE):
+        self.block_size = block_size
+        self._day = None
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+    
+    async def _reserve_block(self, db: AsyncIOMotorDatabase, day: str, size: int):
+        counter = await db.counters.find_one_and_update(
+            {"_id": f"applicationNumber:{day}"},
+            {"$inc": {"seq": size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._end = counter["seq"]
+        self._next = self._end - size + 1
+    
+    async def reserve(self, db: AsyncIOMotorDatabase, count: int = 1) -> List[str]:
+        """Return count unique application numbers for today."""
+        async with self._lock:
+            day = datetime.utcnow().strftime("%Y%m%d")
+            if day != self._day:
+                self._day = day
+                self._next, self._end = 1, 0
+            
+            numbers = []
+            while len(numbers) < count:
+                if self._next > self._end:
+                    await self._reserve_block(db, day, max(self.block_size, count - len(numbers)))
+                numbers.append(format_application_number(day, self._next))
+                self._next += 1
+            return numbers
+
+application_numbers = ApplicationNumberAllocator()
+
+async def next_application_number(db: AsyncIOMotorDatabase) -> str:
+    """Generate a unique application number."""
+    numbers = await application_numbers.reserve(db)
+    return numbers[0]
@@ -1,18 +1,55 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from concurrent.futures import ThreadPoolExecutor
+from models.user import UserRole
+from utils.metrics import password_hash_duration, register_collector
+from utils.resources import get_db
+import asyncio
+import hashlib
+import jwt as pyjwt
+import logging
 import os
+import time
+
+logger = logging.getLogger(__name__)
 
 # Configuration
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
+JWT_BACKEND = os.environ.get("JWT_BACKEND", "jose")  # "jose" or "pyjwt"
+
+# Decoded token claims are cached until the token expires
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE", "10000"))
+_token_cache: "OrderedDict[bytes, dict]" = OrderedDict()
+_token_cache_hits = 0
+_token_cache_misses = 0
+
+# Revoked token versions are held in memory and refreshed from Mongo by every worker
+TOKEN_REVOCATION_REFRESH_SECONDS = float(os.environ.get("TOKEN_REVOCATION_REFRESH_SECONDS", "15"))
+
+# Roles change rarely, so admin checks reuse a recent lookup instead of fetching the user every request
+ROLE_CACHE_TTL = float(os.environ.get("ROLE_CACHE_TTL", "60"))
+ROLE_CACHE_SIZE = int(os.environ.get("ROLE_CACHE_SIZE", "10000"))
+_role_cache: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+
+# Password hashing worker pool (bcrypt releases the GIL, so threads run in parallel)
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE_DEPTH = int(os.environ.get("PASSWORD_HASH_QUEUE_DEPTH", "32"))
+PASSWORD_HASH_RETRY_AFTER = int(os.environ.get("PASSWORD_HASH_RETRY_AFTER", "1"))
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Created on first use and dropped at shutdown, so a restarted app gets a fresh pool
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_pending = 0
 
 # HTTP Bearer token
 security = HTTPBearer()
@@ -25,6 +62,66 @@ def get_password_hash(password: str) -> str:
     """Hash a password."""
     return pwd_context.hash(password)
 
+def _timed_hash_call(operation: str, func, *args):
+    """Run a bcrypt call on a worker thread, recording its duration."""
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        password_hash_duration.observe(time.perf_counter() - start, operation=operation)
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _hash_executor
+
+async def _run_in_hash_pool(operation: str, func, *args):
+    """Run a bcrypt call on the worker pool, rejecting work once the queue is full."""
+    global _hash_pending
+    if _hash_pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_DEPTH:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+        )
+    
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), _timed_hash_call, operation, func, *args)
+    finally:
+        _hash_pending -= 1
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop."""
+    return await _run_in_hash_pool("verify", verify_password, plain_password, hashed_password)
+
+async def ahash_password(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await _run_in_hash_pool("hash", get_password_hash, password)
+
+def password_pool_stats() -> dict:
+    """Return the current state of the password hashing pool."""
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "queueDepth": PASSWORD_HASH_QUEUE_DEPTH,
+        "pending": _hash_pending,
+    }
+
+register_collector(lambda: [
+    ("password_hash_pending", "gauge", "bcrypt calls running or queued on the worker pool", [({}, _hash_pending)]),
+    ("password_hash_capacity", "gauge", "bcrypt calls accepted before returning 503",
+     [({}, PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_DEPTH)]),
+])
+
+def shutdown_password_pool():
+    """Stop the password hashing worker threads."""
+    global _hash_executor
+    executor, _hash_executor = _hash_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -34,39 +131,193 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
     
     to_encode.update({"exp": expire})
+    if JWT_BACKEND == "pyjwt":
+        return pyjwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> dict:
-    """Verify and decode a JWT token."""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+def token_claims(user: dict) -> dict:
+    """Claims identifying a user in an access token: ID, role and token version."""
+    return {
+        "sub": str(user["_id"]),
+        "role": UserRole(user.get("role", UserRole.USER)).value,
+        "ver": user.get("tokenVersion", 0),
+    }
+
+def _decode_token(token: str) -> dict:
+    """Decode and validate a JWT with the configured backend."""
+    if JWT_BACKEND == "pyjwt":
+        return pyjwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+class TokenRevocations:
+    """In-memory list of the oldest token version still valid for each user.
+    
+    Logging out, revoking sessions or changing a role bumps the user's
+    tokenVersion and records it in the token_revocations collection; tokens
+    carrying an older "ver" claim are then rejected without a database lookup.
+    Entries expire with the longest-lived token they could apply to.
+    """
+    
+    def __init__(self):
+        self._min_versions: Dict[str, int] = {}
+        self.refreshed_at: Optional[float] = None
+    
+    def check(self, payload: dict):
+        """Raise 401 if the token's version has been revoked."""
+        min_version = self._min_versions.get(payload["sub"])
+        if min_version is not None and payload.get("ver", 0) < min_version:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
+                detail="Token has been revoked",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return payload
-    except JWTError:
+    
+    async def revoke(self, db: AsyncIOMotorDatabase, user_id: str, min_version: int):
+        """Reject the user's tokens older than min_version, here at once and in other workers after a refresh."""
+        now = datetime.utcnow()
+        self._min_versions[user_id] = max(self._min_versions.get(user_id, 0), min_version)
+        await db.token_revocations.update_one(
+            {"_id": user_id},
+            {
+                "$max": {"minVersion": min_version},
+                "$set": {"updatedAt": now, "expiresAt": now + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)},
+            },
+            upsert=True
+        )
+    
+    async def refresh(self, db: AsyncIOMotorDatabase):
+        """Reload revocations from Mongo; the collection only holds unexpired entries."""
+        min_versions = {}
+        async for doc in db.token_revocations.find({}, {"minVersion": 1}):
+            min_versions[doc["_id"]] = doc["minVersion"]
+        self._min_versions = min_versions
+        self.refreshed_at = time.monotonic()
+    
+    async def run(self, get_db, interval: float = TOKEN_REVOCATION_REFRESH_SECONDS):
+        """Refresh every interval seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh(get_db())
+            except Exception as e:
+                logger.error(f"Token revocation refresh failed: {e}")
+    
+    def __len__(self) -> int:
+        return len(self._min_versions)
+
+token_revocations = TokenRevocations()
+
+register_collector(lambda: [
+    ("token_revocations", "gauge", "Users with revoked token versions held in memory", [({}, len(token_revocations))]),
+])
+
+def verify_token(token: str) -> dict:
+    """Verify and decode a JWT token."""
+    global _token_cache_hits, _token_cache_misses
+    
+    # Serve previously verified tokens from the cache until they expire
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = _token_cache.get(digest)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            _token_cache.move_to_end(digest)
+            _token_cache_hits += 1
+            token_revocations.check(payload)
+            return payload
+        del _token_cache[digest]
+    _token_cache_misses += 1
+    
+    try:
+        payload = _decode_token(token)
+    except (JWTError, pyjwt.PyJWTError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user_id: str = payload.get("sub")
+    if user_id is None or "exp" not in payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    if JWT_CACHE_SIZE > 0:
+        _token_cache[digest] = payload
+        if len(_token_cache) > JWT_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    token_revocations.check(payload)
+    return payload
+
+def token_cache_stats() -> dict:
+    """Return hit/miss counters for the decoded token cache."""
+    lookups = _token_cache_hits + _token_cache_misses
+    return {
+        "backend": JWT_BACKEND,
+        "size": len(_token_cache),
+        "maxSize": JWT_CACHE_SIZE,
+        "hits": _token_cache_hits,
+        "misses": _token_cache_misses,
+        "hitRate": round(_token_cache_hits / lookups, 4) if lookups else 0.0,
+    }
+
+register_collector(lambda: [
+    ("jwt_cache_hits_total", "counter", "Access tokens served from the decoded token cache", [({}, _token_cache_hits)]),
+    ("jwt_cache_misses_total", "counter", "Access tokens decoded and verified", [({}, _token_cache_misses)]),
+    ("jwt_cache_entries", "gauge", "Decoded tokens held in the cache", [({}, len(_token_cache))]),
+])
 
 async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """Get current user ID from JWT token."""
     payload = verify_token(credentials.credentials)
     return payload.get("sub")
 
-def generate_application_number() -> str:
-    """Generate a unique application number."""
-    import random
-    import string
+async def get_user_role(db: AsyncIOMotorDatabase, user_id: str) -> Optional[str]:
+    """Return a user's role, from the role cache when it is fresh; None for unknown users."""
+    cached = _role_cache.get(user_id)
+    if cached is not None and cached[1] > time.monotonic():
+        _role_cache.move_to_end(user_id)
+        return cached[0]
+    
+    user = None
+    if ObjectId.is_valid(user_id):
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, {"role": 1})
+    role = user.get("role", UserRole.USER.value) if user else None
+    
+    _role_cache[user_id] = (role, time.monotonic() + ROLE_CACHE_TTL)
+    _role_cache.move_to_end(user_id)
+    if len(_role_cache) > ROLE_CACHE_SIZE:
+        _role_cache.popitem(last=False)
+    return role
+
+def forget_user_role(user_id: str):
+    """Drop a cached role so the next check sees a role change immediately in this worker."""
+    _role_cache.pop(user_id, None)
+
+def require_role(*roles: UserRole):
+    """Build a dependency returning the current user ID if the token's role claim is one of roles.
+    
+    Tokens issued before role claims existed fall back to the role cache.
+    """
+    allowed = {role.value for role in roles}
     
-    # Format: USA-YYYYMMDD-XXXX (e.g., USA-20240102-A1B2)
-    today = datetime.now().strftime("%Y%m%d")
-    random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"USA-{today}-{random_part}"
\ No newline at end of file
+    async def dependency(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: AsyncIOMotorDatabase = Depends(get_db)
+    ) -> str:
+        payload = verify_token(credentials.credentials)
+        role = payload.get("role")
+        if role is None:
+            role = await get_user_role(db, payload["sub"])
+        if role not in allowed:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"{' or '.join(sorted(allowed)).capitalize()} access required"
+            )
+        return payload["sub"]
+    return dependency
+
+get_current_admin_id = require_role(UserRole.ADMIN)
@@ -0,0 +1,117 @@
+from fastapi import Request, Response
+from collections import OrderedDict
+from typing import Dict, Optional
+from utils.metrics import register_collector
+import hashlib
+import time
+
+# All caches by name, for stats and invalidation
+_caches: Dict[str, "ResponseCache"] = {}
+
+class CachedResponse:
+    """A serialized response body with its ETag."""
+    
+    __slots__ = ("body", "etag", "expires_at")
+    
+    def __init__(self, body: bytes, etag: str, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+class ResponseCache:
+    """Versioned in-process cache of serialized JSON response bodies with a TTL.
+    
+    Holds at most max_entries bodies, evicting the least recently used.
+    """
+    
+    def __init__(self, name: str, ttl: float, max_entries: int = 256):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        _caches[name] = self
+    
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return a fresh cached entry, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+    
+    def set(self, key: str, body: bytes, version: int) -> CachedResponse:
+        """Store a body built while the cache was at the given version.
+        
+        If the cache was invalidated while the body was being built, the body
+        is returned to the caller but not stored.
+        """
+        digest = hashlib.sha1(body).hexdigest()
+        entry = CachedResponse(body, f'"{self.version}-{digest}"', time.monotonic() + self.ttl)
+        if version == self.version:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+    
+    def invalidate(self):
+        """Drop all entries and move to a new version."""
+        self.version += 1
+        self.invalidations += 1
+        self._entries.clear()
+    
+    def stats(self) -> dict:
+        """Return hit/miss counters for this cache."""
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "ttlSeconds": self.ttl,
+            "maxEntries": self.max_entries,
+        }
+
+def cache_stats() -> dict:
+    """Return stats for every registered cache."""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+def _cache_metrics() -> list:
+    samples = {"hits": [], "misses": [], "invalidations": [], "evictions": [], "entries": []}
+    for name, cache in _caches.items():
+        stats = cache.stats()
+        for key in samples:
+            samples[key].append(({"cache": name}, stats[key]))
+    return [
+        ("response_cache_hits_total", "counter", "Response cache hits", samples["hits"]),
+        ("response_cache_misses_total", "counter", "Response cache misses", samples["misses"]),
+        ("response_cache_invalidations_total", "counter", "Response cache invalidations", samples["invalidations"]),
+        ("response_cache_evictions_total", "counter", "Entries evicted to keep each response cache bounded", samples["evictions"]),
+        ("response_cache_entries", "gauge", "Entries held by each response cache", samples["entries"]),
+    ]
+
+register_collector(_cache_metrics)
+
+def get_cache(name: str) -> Optional[ResponseCache]:
+    """Look up a registered cache by name."""
+    return _caches.get(name)
+
+def cached_response(request: Request, entry: CachedResponse) -> Response:
+    """Build a response for a cached entry, answering 304 when the client's ETag matches."""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,193 @@
+from dataclasses import dataclass
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+from typing import Dict, Mapping, Optional, Tuple
+import importlib.util
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+READ_PREFERENCE_MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Wire compressors and the module each one needs
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+def _int(environ: Mapping[str, str], name: str, default: Optional[int]) -> Optional[int]:
+    value = environ.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+@dataclass(frozen=True)
+class MongoSettings:
+    """Connection pool, timeout, compression and routing settings for the Mongo client."""
+
+    url: str
+    db_name: str
+    app_name: str = "kpvs-visa-api"
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = 300_000
+    # Fail requests quickly instead of queueing forever when the pool is exhausted
+    wait_queue_timeout_ms: Optional[int] = 5_000
+    server_selection_timeout_ms: int = 5_000
+    connect_timeout_ms: int = 5_000
+    socket_timeout_ms: Optional[int] = None
+    compressors: Tuple[str, ...] = ("zstd", "zlib")  # snappy needs python-snappy
+    # Reference data (countries, FAQs) and reports tolerate replication lag
+    reference_read_preference: str = "secondaryPreferred"
+    analytics_read_preference: str = "secondaryPreferred"
+    max_staleness_seconds: int = -1
+    write_concern: str = "majority"
+    write_timeout_ms: Optional[int] = 10_000
+    # Derived counters are reconciled periodically, so an acknowledged write is enough
+    counter_write_concern: str = "1"
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "MongoSettings":
+        """Read settings from MONGO_* environment variables, falling back to the defaults."""
+        defaults = cls(url="", db_name="")
+        compressors = environ.get("MONGO_COMPRESSORS")
+        settings = cls(
+            url=environ["MONGO_URL"],
+            db_name=environ["DB_NAME"],
+            app_name=environ.get("MONGO_APP_NAME", defaults.app_name),
+            max_pool_size=_int(environ, "MONGO_MAX_POOL_SIZE", defaults.max_pool_size),
+            min_pool_size=_int(environ, "MONGO_MIN_POOL_SIZE", defaults.min_pool_size),
+            max_idle_time_ms=_int(environ, "MONGO_MAX_IDLE_TIME_MS", defaults.max_idle_time_ms),
+            wait_queue_timeout_ms=_int(environ, "MONGO_WAIT_QUEUE_TIMEOUT_MS", defaults.wait_queue_timeout_ms),
+            server_selection_timeout_ms=_int(
+                environ, "MONGO_SERVER_SELECTION_TIMEOUT_MS", defaults.server_selection_timeout_ms
+            ),
+            connect_timeout_ms=_int(environ, "MONGO_CONNECT_TIMEOUT_MS", defaults.connect_timeout_ms),
+            socket_timeout_ms=_int(environ, "MONGO_SOCKET_TIMEOUT_MS", defaults.socket_timeout_ms),
+            compressors=(
+                tuple(name.strip() for name in compressors.split(",") if name.strip())
+                if compressors is not None else defaults.compressors
+            ),
+            reference_read_preference=environ.get("MONGO_REFERENCE_READ_PREFERENCE", defaults.reference_read_preference),
+            analytics_read_preference=environ.get("MONGO_ANALYTICS_READ_PREFERENCE", defaults.analytics_read_preference),
+            max_staleness_seconds=_int(environ, "MONGO_MAX_STALENESS_SECONDS", defaults.max_staleness_seconds),
+            write_concern=environ.get("MONGO_WRITE_CONCERN", defaults.write_concern),
+            write_timeout_ms=_int(environ, "MONGO_WRITE_TIMEOUT_MS", defaults.write_timeout_ms),
+            counter_write_concern=environ.get("MONGO_COUNTER_WRITE_CONCERN", defaults.counter_write_concern),
+        )
+        settings.validate()
+        return settings
+
+    def validate(self):
+        if self.min_pool_size > self.max_pool_size > 0:
+            raise ValueError("MONGO_MIN_POOL_SIZE cannot exceed MONGO_MAX_POOL_SIZE")
+        for name in (self.reference_read_preference, self.analytics_read_preference):
+            if name not in READ_PREFERENCE_MODES:
+                raise ValueError(f"Unknown read preference {name!r}, expected one of: {', '.join(READ_PREFERENCE_MODES)}")
+        unknown = [name for name in self.compressors if name not in COMPRESSOR_MODULES]
+        if unknown:
+            raise ValueError(f"Unknown compressors: {', '.join(unknown)}")
+        if 0 <= self.max_staleness_seconds < 90:
+            raise ValueError("MONGO_MAX_STALENESS_SECONDS must be -1 (no limit) or at least 90")
+
+    def available_compressors(self) -> Tuple[str, ...]:
+        """Configured compressors whose libraries are installed, in preference order."""
+        available = tuple(
+            name for name in self.compressors if importlib.util.find_spec(COMPRESSOR_MODULES[name]) is not None
+        )
+        missing = set(self.compressors) - set(available)
+        if missing:
+            logger.warning(f"Mongo compressors unavailable (library not installed): {', '.join(sorted(missing))}")
+        return available
+
+    def client_options(self) -> dict:
+        """Keyword arguments for AsyncIOMotorClient."""
+        options = {
+            "appname": self.app_name,
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "w": int(self.write_concern) if self.write_concern.isdigit() else self.write_concern,
+            "wTimeoutMS": self.write_timeout_ms,
+        }
+        compressors = self.available_compressors()
+        if compressors:
+            options["compressors"] = ",".join(compressors)
+        return {key: value for key, value in options.items() if value is not None}
+
+    def read_preference(self, mode: str):
+        preference = READ_PREFERENCE_MODES[mode]
+        if preference is Primary:
+            return Primary()
+        return preference(max_staleness=self.max_staleness_seconds)
+
+    def build_write_concern(self, w: str) -> WriteConcern:
+        return WriteConcern(w=int(w) if w.isdigit() else w, wtimeout=self.write_timeout_ms)
+
+# Per-route profiles, filled in from the settings by configure_profiles();
+# None inherits the client's setting
+READ_PROFILES = {"primary": None, "reference": None, "analytics": None}
+WRITE_PROFILES: Dict[str, Optional[WriteConcern]] = {"default": None, "counter": None}
+
+def configure_profiles(settings: MongoSettings):
+    """Build the read preference and write concern profiles used by the routes."""
+    READ_PROFILES["reference"] = settings.read_preference(settings.reference_read_preference)
+    READ_PROFILES["analytics"] = settings.read_preference(settings.analytics_read_preference)
+    WRITE_PROFILES["counter"] = settings.build_write_concern(settings.counter_write_concern)
+
+# Database attributes a profiled view passes through to the database it wraps
+DATABASE_ATTRIBUTES = frozenset({
+    "client", "codec_options", "read_concern",
+    "command", "aggregate", "watch",
+    "list_collection_names", "list_collections", "create_collection", "drop_collection",
+})
+
+class ProfiledDatabase:
+    """View of a database whose collections use a read preference and write concern profile.
+    
+    Collections are reached as db[name] or db.name, like on a Motor database.
+    Database-level operations listed in DATABASE_ATTRIBUTES use the wrapped
+    database's own options; other database attributes are not available.
+    """
+
+    def __init__(self, db, read: str = "primary", write: str = "default"):
+        self._db = db
+        self._read_preference = READ_PROFILES[read]
+        self._write_concern = WRITE_PROFILES[write]
+
+    @property
+    def name(self) -> str:
+        return self._db.name
+
+    def get_collection(self, name: str, **options):
+        options.setdefault("read_preference", self._read_preference)
+        options.setdefault("write_concern", self._write_concern)
+        return self._db.get_collection(name, **options)
+
+    def __getitem__(self, name: str):
+        return self.get_collection(name)
+
+    def __getattr__(self, name: str):
+        if name in DATABASE_ATTRIBUTES:
+            return getattr(self._db, name)
+        if name.startswith("_") or hasattr(type(self._db), name):
+            # Never mistake a database attribute for a collection
+            raise AttributeError(f"{type(self).__name__} has no attribute {name!r}")
+        return self[name]
+
+def use_profile(db, read: str = "primary", write: str = "default") -> ProfiledDatabase:
+    """Route a request's queries with the given read and write profiles."""
+    if isinstance(db, ProfiledDatabase):
+        db = db._db
+    return ProfiledDatabase(db, read, write)
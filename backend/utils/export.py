@@ -0,0 +1,97 @@
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator
+from bson import ObjectId
+import csv
+import io
+import json
+import zlib
+
+# Rows are buffered up to this many bytes before being compressed and sent
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Flattened export columns, in CSV order
+EXPORT_COLUMNS = [
+    "id", "userId", "applicationNumber", "status",
+    "visaType.id", "visaType.name", "visaType.duration", "visaType.validity", "visaType.price",
+    "personalInfo.fullName", "personalInfo.email", "personalInfo.phone", "personalInfo.citizenship",
+    "personalInfo.dateOfBirth", "personalInfo.placeOfBirth", "personalInfo.gender",
+    "travelDetails.purpose", "travelDetails.arrivalDate", "travelDetails.departureDate",
+    "travelDetails.duration", "travelDetails.accommodation", "travelDetails.previousVisits",
+    "passportInfo.number", "passportInfo.issueDate", "passportInfo.expiryDate", "passportInfo.issuingCountry",
+    "payment.status", "payment.amount", "payment.currency", "payment.transactionId", "payment.paidAt",
+    "documentCount", "currentStep", "completedSteps", "createdAt", "updatedAt", "submittedAt",
+]
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+def _scalar(value):
+    """Convert a BSON value to a JSON/CSV friendly scalar."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    return value
+
+def flatten_application(application: dict) -> dict:
+    """Flatten an application document into the export columns."""
+    row = {}
+    for column in EXPORT_COLUMNS:
+        if column == "id":
+            value = application.get("_id")
+        elif column == "documentCount":
+            value = len(application.get("documents") or [])
+        elif "." in column:
+            parent, child = column.split(".", 1)
+            value = (application.get(parent) or {}).get(child)
+        else:
+            value = application.get(column)
+        row[column] = _scalar(value)
+    return row
+
+async def stream_export(cursor, export_format: ExportFormat, compress: bool = True) -> AsyncIterator[bytes]:
+    """Stream documents from an async cursor as NDJSON or CSV, optionally gzipped.
+    
+    Only one chunk of rows is held in memory at a time, whatever the result size.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = None
+    
+    if export_format == ExportFormat.CSV:
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+    
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+    
+    async for application in cursor:
+        row = flatten_application(application)
+        if writer:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(row, separators=(",", ":")))
+            buffer.write("\n")
+        
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            chunk = drain()
+            if chunk:
+                yield chunk
+    
+    tail = drain()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
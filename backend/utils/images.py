@@ -0,0 +1,229 @@
+from fastapi import HTTPException, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from models.visa_application import DocumentType
+from utils.metrics import Counter, Histogram, register_collector
+from utils.storage import blob_path, rendition_dir
+from pathlib import Path
+from typing import Dict, Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Pipeline configuration
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", min(2, os.cpu_count() or 1)))
+IMAGE_QUEUE_SIZE = int(os.environ.get("IMAGE_QUEUE_SIZE", "64"))
+IMAGE_ENQUEUE_TIMEOUT = float(os.environ.get("IMAGE_ENQUEUE_TIMEOUT", "2"))
+IMAGE_RENDER_TIMEOUT = float(os.environ.get("IMAGE_RENDER_TIMEOUT", "30"))
+IMAGE_RETRY_AFTER = int(os.environ.get("IMAGE_RETRY_AFTER", "5"))
+
+# Bounding boxes of the generated renditions, largest first
+RENDITION_SIZES = {
+    "review": (1600, 1600),
+    "thumbnail": (320, 320),
+}
+
+# Every rendition is written in each format; WebP is served to clients that accept it
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+# Errors meaning the content itself cannot be decoded; anything else may succeed on retry
+UNDECODABLE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError)
+
+RENDERED_TYPES = {DocumentType.PHOTO, DocumentType.PASSPORT}
+RENDERED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp"}
+
+image_render_duration = Histogram(
+    "image_render_duration_seconds", "Time to render all renditions of one image"
+)
+image_jobs = Counter("image_jobs_total", "Image pipeline jobs by outcome", ("outcome",))
+
+def is_renderable(document_type: DocumentType, content_type: str) -> bool:
+    return document_type in RENDERED_TYPES and content_type in RENDERED_CONTENT_TYPES
+
+def rendition_path(sha256: str, name: str, fmt: str) -> Path:
+    return rendition_dir(sha256) / f"{name}.{fmt}"
+
+def rendition_urls(document_id: str, document_type: DocumentType, content_type: str) -> Dict[str, str]:
+    """Rendition URLs for a document, or {} when it is not an image we render."""
+    if not is_renderable(document_type, content_type):
+        return {}
+    return {name: f"/api/upload/documents/{document_id}/renditions/{name}" for name in RENDITION_SIZES}
+
+def failure_marker(sha256: str) -> Path:
+    return rendition_dir(sha256) / ".failed"
+
+def is_rendered(sha256: str) -> bool:
+    return all(
+        rendition_path(sha256, name, fmt).exists()
+        for name in RENDITION_SIZES for fmt in RENDITION_FORMATS
+    )
+
+def render_renditions(source: str, target_dir: str):
+    """Write every rendition of an image file. Runs in a worker process."""
+    target = Path(target_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as image:
+        # Let the JPEG decoder scale down while decoding instead of after
+        image.draft("RGB", max(RENDITION_SIZES.values()))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        # Each rendition is downscaled from the previous, larger one
+        for name, size in RENDITION_SIZES.items():
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+            for fmt, (pil_format, _, options) in RENDITION_FORMATS.items():
+                path = target / f"{name}.{fmt}"
+                temp_path = target / f".{name}.{fmt}.{os.getpid()}"
+                image.save(temp_path, format=pil_format, **options)
+                os.replace(temp_path, path)
+
+class ImagePipeline:
+    """Bounded job queue feeding a process pool that renders image renditions."""
+
+    def __init__(self, workers: int = IMAGE_WORKERS, queue_size: int = IMAGE_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._jobs: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._loop = None
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._executor is None:
+            self._executor = self._create_executor()
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._jobs = {}
+        # One consumer per process keeps the pool busy without queueing inside it
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # Forking a process with live Motor and bcrypt threads is unsafe
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            sha256, future = await self._queue.get()
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(
+                    self._executor, render_renditions, str(blob_path(sha256)), str(rendition_dir(sha256))
+                )
+                image_render_duration.observe(time.perf_counter() - start)
+                image_jobs.inc(outcome="rendered")
+                future.set_result(True)
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for memory); replace the pool for later jobs
+                logger.error(f"Image worker pool failed while rendering {sha256}: {e}")
+                image_jobs.inc(outcome="failed")
+                future.set_result(False)
+                broken, self._executor = self._executor, self._create_executor()
+                broken.shutdown(wait=False, cancel_futures=True)
+            except UNDECODABLE_ERRORS as e:
+                logger.warning(f"Image {sha256} cannot be decoded: {e}")
+                image_jobs.inc(outcome="failed")
+                # Remember undecodable content so it is not retried on every request
+                marker = failure_marker(sha256)
+                marker.parent.mkdir(parents=True, exist_ok=True)
+                marker.touch()
+                future.set_result(False)
+            except Exception as e:
+                # Disk, memory and process errors are not the content's fault; the next request retries
+                logger.error(f"Rendering {sha256} failed: {e}")
+                image_jobs.inc(outcome="failed")
+                future.set_result(False)
+            finally:
+                self._jobs.pop(sha256, None)
+                self._queue.task_done()
+
+    async def warm_up(self):
+        """Start the worker processes ahead of the first upload."""
+        self._ensure_started()
+        await asyncio.gather(*(
+            self._loop.run_in_executor(self._executor, os.getpid) for _ in range(self.workers)
+        ))
+
+    async def submit(self, sha256: str, timeout: float = IMAGE_ENQUEUE_TIMEOUT) -> Optional[asyncio.Future]:
+        """Queue an image for rendering, waiting up to timeout for space.
+
+        Returns a future resolving to True once renditions exist, or None if the
+        queue stayed full.
+        """
+        self._ensure_started()
+        if sha256 in self._jobs:
+            return self._jobs[sha256]
+        future = self._loop.create_future()
+        if is_rendered(sha256):
+            # Renditions are keyed by content, so duplicate uploads reuse them
+            image_jobs.inc(outcome="cached")
+            future.set_result(True)
+            return future
+        if failure_marker(sha256).exists():
+            future.set_result(False)
+            return future
+
+        self._jobs[sha256] = future
+        try:
+            await asyncio.wait_for(self._queue.put((sha256, future)), timeout)
+        except asyncio.TimeoutError:
+            self._jobs.pop(sha256, None)
+            image_jobs.inc(outcome="rejected")
+            return None
+        return future
+
+    async def render(self, sha256: str) -> bool:
+        """Render on demand, for a rendition requested before the background job ran."""
+        future = await self.submit(sha256)
+        if future is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Image processing is busy, please retry shortly",
+                headers={"Retry-After": str(IMAGE_RETRY_AFTER)},
+            )
+        return await asyncio.wait_for(asyncio.shield(future), IMAGE_RENDER_TIMEOUT)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queueSize": self.queue_size,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "inFlight": len(self._jobs),
+        }
+
+    def shutdown(self):
+        """Stop the consumers and worker processes."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._loop = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+image_pipeline = ImagePipeline()
+
+register_collector(lambda: [
+    ("image_pipeline_queue_depth", "gauge", "Image jobs waiting for a worker process",
+     [({}, image_pipeline.stats()["queued"])]),
+    ("image_pipeline_in_flight", "gauge", "Image jobs queued or rendering", [({}, image_pipeline.stats()["inFlight"])]),
+    ("image_pipeline_queue_capacity", "gauge", "Image jobs accepted before uploads wait", [({}, image_pipeline.queue_size)]),
+])
@@ -0,0 +1,144 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+from datetime import datetime
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Indexes backing the hot query paths: (collection, keys, options)
+INDEXES = [
+    ("users", [("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+    ("visa_applications", [("userId", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)], {"name": "userId_createdAt_id"}),
+    # Date range filters, and the export walking applications in creation order
+    ("visa_applications", [("createdAt", DESCENDING), ("_id", DESCENDING)], {"name": "createdAt_id"}),
+    ("visa_applications", [("applicationNumber", ASCENDING)], {"name": "applicationNumber_unique", "unique": True}),
+    # Lets blob garbage collection drop upload records by content hash
+    ("documents", [("sha256", ASCENDING)], {"name": "sha256"}),
+    # Revocations are only needed while the tokens they cover can still be valid
+    ("token_revocations", [("expiresAt", ASCENDING)], {"name": "expiresAt_ttl", "expireAfterSeconds": 0}),
+    # Shared rate limit windows are dropped once they have passed
+    ("rate_limits", [("expiresAt", ASCENDING)], {"name": "expiresAt_ttl", "expireAfterSeconds": 0}),
+    ("countries", [("code", ASCENDING)], {"name": "code_unique", "unique": True}),
+    ("faqs", [("isActive", ASCENDING), ("order", ASCENDING), ("createdAt", DESCENDING)], {"name": "isActive_order_createdAt"}),
+    # Backs the $text fallback of FAQ search
+    ("faqs", [("question", TEXT), ("answer", TEXT)], {"name": "question_answer_text", "weights": {"question": 2, "answer": 1}}),
+]
+
+# Representative queries issued by the routes, used for the explain report
+ROUTE_QUERIES = [
+    {
+        "route": "POST /auth/register, POST /auth/login",
+        "collection": "users",
+        "filter": {"email": "explain@example.com"},
+    },
+    {
+        "route": "GET /visa-applications",
+        "collection": "visa_applications",
+        "filter": {"userId": "000000000000000000000000"},
+        "sort": {"createdAt": -1, "_id": -1},
+    },
+    {
+        "route": "GET /admin/exports/visa-applications",
+        "collection": "visa_applications",
+        "filter": {"createdAt": {"$gte": datetime(2024, 1, 1)}},
+        "sort": {"createdAt": 1, "_id": 1},
+    },
+    {
+        "route": "GET /countries/{country_code}",
+        "collection": "countries",
+        "filter": {"code": "US"},
+    },
+    {
+        "route": "GET /faqs",
+        "collection": "faqs",
+        "filter": {"isActive": True},
+        "sort": {"order": 1, "createdAt": -1},
+    },
+]
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> dict:
+    """Create the application indexes. Safe to run on every startup."""
+    
+    timings = {}
+    total_start = time.perf_counter()
+    
+    for collection, keys, options in INDEXES:
+        start = time.perf_counter()
+        try:
+            await db[collection].create_index(keys, **options)
+        except OperationFailure as e:
+            # A conflicting definition or duplicate data must not stop the API from starting
+            logger.error(f"Failed to create index {collection}.{options['name']}: {e}")
+            continue
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timings[f"{collection}.{options['name']}"] = round(elapsed_ms, 2)
+        logger.info(f"Index {collection}.{options['name']} ready in {elapsed_ms:.1f} ms")
+    
+    logger.info(f"Index bootstrap finished in {(time.perf_counter() - total_start) * 1000:.1f} ms")
+    return timings
+
+def _plan_stages(plan: dict) -> list:
+    """Flatten a query plan tree into (stage, indexName) pairs."""
+    stages = [(plan.get("stage"), plan.get("indexName"))]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+async def explain_route_queries(db: AsyncIOMotorDatabase) -> dict:
+    """Dry run: report missing indexes and whether each route query is index-backed."""
+    
+    missing = []
+    for collection, keys, options in INDEXES:
+        existing = await db[collection].index_information()
+        if options["name"] not in existing:
+            missing.append(f"{collection}.{options['name']}")
+    
+    queries = []
+    for query in ROUTE_QUERIES:
+        command = {"find": query["collection"], "filter": query["filter"]}
+        if "sort" in query:
+            command["sort"] = query["sort"]
+        
+        explain = await db.command("explain", command, verbosity="queryPlanner")
+        stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        index_names = [name for _, name in stages if name]
+        queries.append({
+            "route": query["route"],
+            "collection": query["collection"],
+            "stages": [stage for stage, _ in stages],
+            "index": index_names[0] if index_names else None,
+            "covered": not any(stage in ("COLLSCAN", "SORT") for stage, _ in stages),
+        })
+    
+    return {"missingIndexes": missing, "queries": queries}
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import json
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+    
+    parser = argparse.ArgumentParser(description="Create indexes or report index coverage of route queries.")
+    parser.add_argument("--apply", action="store_true", help="create missing indexes instead of only reporting")
+    args = parser.parse_args()
+    
+    load_dotenv(Path(__file__).parent.parent / '.env')
+    logging.basicConfig(level=logging.INFO)
+    
+    async def main():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        db = client[os.environ['DB_NAME']]
+        if args.apply:
+            await ensure_indexes(db)
+        print(json.dumps(await explain_route_queries(db), indent=2))
+        client.close()
+    
+    asyncio.run(main())
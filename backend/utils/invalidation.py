@@ -0,0 +1,151 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from utils.metrics import Counter, register_collector
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# "auto" follows change streams when the deployment supports them and polls otherwise
+CACHE_INVALIDATION_MODE = os.environ.get("CACHE_INVALIDATION_MODE", "auto")  # "auto" or "poll"
+# How often each worker checks for cache changes made by other workers when polling
+CACHE_VERSION_POLL_SECONDS = float(os.environ.get("CACHE_VERSION_POLL_SECONDS", "2"))
+CHANGE_STREAM_RETRY_SECONDS = float(os.environ.get("CHANGE_STREAM_RETRY_SECONDS", "5"))
+
+# Server errors meaning change streams are unavailable (standalone mongod, very old servers)
+CHANGE_STREAM_UNSUPPORTED_CODES = {40573, 40324}
+
+cache_invalidations_received = Counter(
+    "cache_invalidations_received_total", "Cache invalidations applied on behalf of other workers", ("cache", "source")
+)
+
+class InvalidationChannel:
+    """Propagates cache invalidations between worker processes.
+
+    Where change streams are available, each worker watches the collections
+    behind its caches and invalidates on every write, including writes made
+    outside the API. Otherwise each named cache has a document in
+    "cache_versions" whose version is bumped by publish(); workers poll the
+    collection and run their local handlers when a version moves past the one
+    they last saw.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[], None]]] = {}
+        self._collections: Dict[str, str] = {}
+        self._seen: Dict[str, int] = {}
+        self._synced = False
+        self.mode = "starting"
+
+    def subscribe(self, name: str, handler: Callable[[], None], collection: Optional[str] = None):
+        """Run handler whenever the named cache is invalidated by any worker.
+        
+        collection names the source collection watched with change streams.
+        """
+        self._handlers.setdefault(name, []).append(handler)
+        if collection:
+            self._collections[collection] = name
+
+    def _invalidate_locally(self, name: str):
+        for handler in self._handlers.get(name, []):
+            try:
+                handler()
+            except Exception as e:
+                logger.error(f"Invalidation handler for {name} failed: {e}")
+
+    async def publish(self, db: AsyncIOMotorDatabase, name: str):
+        """Invalidate a cache here and announce the change to the other workers."""
+        self._invalidate_locally(name)
+        doc = await db.cache_versions.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"version": 1}, "$set": {"updatedAt": datetime.utcnow()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        # Already applied here, so the next poll must not repeat it
+        self._seen[name] = max(self._seen.get(name, 0), doc["version"])
+
+    async def sync(self, db: AsyncIOMotorDatabase) -> List[str]:
+        """Apply invalidations published since the last sync; returns the caches invalidated.
+
+        The first sync only records the current versions, so it should run
+        before the caches are first filled.
+        """
+        changed = []
+        async for doc in db.cache_versions.find({}, {"version": 1}):
+            name, version = doc["_id"], doc.get("version", 0)
+            if self._synced and version > self._seen.get(name, 0):
+                changed.append(name)
+            self._seen[name] = max(self._seen.get(name, 0), version)
+        self._synced = True
+
+        for name in changed:
+            self._invalidate_locally(name)
+            cache_invalidations_received.inc(cache=name, source="poll")
+        if changed:
+            logger.info(f"Invalidated caches changed by other workers: {changed}")
+        return changed
+
+    async def watch(self, db: AsyncIOMotorDatabase):
+        """Invalidate caches from a change stream on their source collections until it fails."""
+        pipeline = [
+            {"$match": {"ns.coll": {"$in": list(self._collections)}}},
+            # Only the namespace is needed, not the changed documents
+            {"$project": {"ns": 1, "operationType": 1}},
+        ]
+        async with db.watch(pipeline) as stream:
+            self.mode = "changestream"
+            # Writes made while the stream was not open were missed
+            for name in set(self._collections.values()):
+                self._invalidate_locally(name)
+            logger.info(f"Following cache invalidations from change streams on {sorted(self._collections)}")
+            async for change in stream:
+                name = self._collections.get(change.get("ns", {}).get("coll"))
+                if name is None:
+                    continue
+                self._invalidate_locally(name)
+                cache_invalidations_received.inc(cache=name, source="changestream")
+
+    async def _follow_changes(self, get_db):
+        """Keep a change stream open, reconnecting after errors; returns if change streams are unavailable."""
+        while True:
+            try:
+                await self.watch(get_db())
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAM_UNSUPPORTED_CODES:
+                    logger.info(f"Change streams unavailable, polling cache versions: {e}")
+                    return
+                logger.error(f"Cache change stream failed: {e}")
+            except PyMongoError as e:
+                logger.error(f"Cache change stream failed: {e}")
+            except Exception as e:
+                logger.warning(f"Cache change stream unusable, polling cache versions: {e}")
+                return
+            self.mode = "reconnecting"
+            await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
+
+    async def run(self, get_db, interval: float = CACHE_VERSION_POLL_SECONDS, mode: str = CACHE_INVALIDATION_MODE):
+        """Follow invalidations from other workers until cancelled."""
+        if mode == "auto" and self._collections:
+            await self._follow_changes(get_db)
+        self.mode = "poll"
+        while True:
+            try:
+                await self.sync(get_db())
+            except Exception as e:
+                logger.error(f"Cache version poll failed: {e}")
+            await asyncio.sleep(interval)
+
+cache_invalidation = InvalidationChannel()
+
+def _invalidation_metrics() -> list:
+    return [(
+        "cache_invalidation_mode", "gauge", "How this worker learns about cache changes (1 for the active mode)",
+        [({"mode": cache_invalidation.mode}, 1)]
+    )]
+
+register_collector(_invalidation_metrics)
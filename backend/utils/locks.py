@@ -0,0 +1,134 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Lease settings for locks held in the "locks" collection
+LOCK_TTL_SECONDS = float(os.environ.get("LOCK_TTL_SECONDS", "60"))
+LOCK_POLL_SECONDS = float(os.environ.get("LOCK_POLL_SECONDS", "0.5"))
+
+def lock_owner() -> str:
+    """Identify this process as a lock holder."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+async def acquire_lock(
+    db: AsyncIOMotorDatabase,
+    name: str,
+    owner: str,
+    ttl: float = LOCK_TTL_SECONDS,
+    not_completed_since: Optional[datetime] = None,
+) -> bool:
+    """Take a named lease if it is free or expired; False if another process holds it.
+    
+    With not_completed_since, the lease is also refused once a holder has
+    completed the work at or after that time.
+    """
+    now = datetime.utcnow()
+    conditions = [{"$or": [{"owner": None}, {"expiresAt": {"$lt": now}}]}]
+    if not_completed_since is not None:
+        conditions.append({"$or": [{"completedAt": None}, {"completedAt": {"$lt": not_completed_since}}]})
+    query = {"_id": name, "$and": conditions}
+    try:
+        lock = await db.locks.find_one_and_update(
+            query,
+            {"$set": {"owner": owner, "acquiredAt": now, "expiresAt": now + timedelta(seconds=ttl)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # The filter did not match, so the upsert collided with a held lock
+        return False
+    return lock is not None and lock["owner"] == owner
+
+async def renew_lock(db: AsyncIOMotorDatabase, name: str, owner: str, ttl: float = LOCK_TTL_SECONDS) -> bool:
+    """Extend a lease this process holds; False if it was lost."""
+    result = await db.locks.update_one(
+        {"_id": name, "owner": owner},
+        {"$set": {"expiresAt": datetime.utcnow() + timedelta(seconds=ttl)}}
+    )
+    return result.matched_count == 1
+
+async def release_lock(db: AsyncIOMotorDatabase, name: str, owner: str, completed: bool = False):
+    """Give up a lease, recording completion so waiting processes can skip the work."""
+    update = {"owner": None, "expiresAt": None}
+    if completed:
+        update["completedAt"] = datetime.utcnow()
+    await db.locks.update_one({"_id": name, "owner": owner}, {"$set": update})
+
+async def keep_lock(db: AsyncIOMotorDatabase, name: str, owner: str, ttl: float = LOCK_TTL_SECONDS):
+    """Renew a held lease until cancelled or lost."""
+    while True:
+        await asyncio.sleep(ttl / 3)
+        if not await renew_lock(db, name, owner, ttl):
+            logger.warning(f"Lost the {name} lock while running it")
+            return
+
+async def _run_holding(
+    db: AsyncIOMotorDatabase,
+    name: str,
+    owner: str,
+    step: Callable[[], Awaitable[None]],
+    ttl: float,
+):
+    """Run step under an acquired lease, renewing it, then release it."""
+    renewer = asyncio.create_task(keep_lock(db, name, owner, ttl))
+    completed = False
+    try:
+        await step()
+        completed = True
+    finally:
+        renewer.cancel()
+        await asyncio.gather(renewer, return_exceptions=True)
+        await release_lock(db, name, owner, completed)
+
+async def run_exclusive(
+    db: AsyncIOMotorDatabase,
+    name: str,
+    step: Callable[[], Awaitable[None]],
+    ttl: float = LOCK_TTL_SECONDS,
+    not_completed_since: Optional[datetime] = None,
+) -> bool:
+    """Run step unless another process holds the lease, or completed it since not_completed_since.
+    
+    Unlike run_once, nothing waits; returns True if this process ran step.
+    """
+    owner = lock_owner()
+    if not await acquire_lock(db, name, owner, ttl, not_completed_since=not_completed_since):
+        return False
+    await _run_holding(db, name, owner, step, ttl)
+    return True
+
+async def run_once(
+    db: AsyncIOMotorDatabase,
+    name: str,
+    step: Callable[[], Awaitable[None]],
+    ttl: float = LOCK_TTL_SECONDS,
+) -> bool:
+    """Run step in exactly one of the processes starting together.
+
+    The process that wins the lease runs step while renewing it; the others
+    wait until it completes. If the holder fails or dies, a waiter takes over
+    once the lease is released or expires. Returns True if this process ran step.
+    """
+    owner = lock_owner()
+    started = datetime.utcnow()
+
+    while True:
+        if await acquire_lock(db, name, owner, ttl, not_completed_since=started):
+            break
+        lock = await db.locks.find_one({"_id": name}, {"completedAt": 1})
+        if lock and lock.get("completedAt") and lock["completedAt"] >= started:
+            logger.info(f"Startup step {name} completed by another worker")
+            return False
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+
+    await _run_holding(db, name, owner, step, ttl)
+    return True
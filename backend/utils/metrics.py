@@ -0,0 +1,257 @@
+from pymongo import monitoring
+from typing import Callable, Dict, List, Tuple
+import threading
+import time
+
+# Latency buckets in seconds and size buckets in bytes
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Collectors produce (name, type, help, [(labels, value)]) at scrape time
+_collectors: List[Callable[[], list]] = []
+_metrics: List["_Metric"] = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+class _Metric:
+    """Base class for labelled metrics; safe to update from any thread."""
+
+    type = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(dict(zip(self.labelnames, key)), value))
+        return lines
+
+    def _render_sample(self, labels: dict, value) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {value}"]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += 1
+            state[2] += value
+
+    def _render_sample(self, labels: dict, value) -> List[str]:
+        bucket_counts, count, total = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, bucket_counts):
+            cumulative += bucket_count
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {cumulative}")
+        lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+        return lines
+
+def register_collector(collector: Callable[[], list]):
+    """Register a function returning [(name, type, help, [(labels, value)])] at scrape time."""
+    _collectors.append(collector)
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for name, metric_type, help_text, samples in collector():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+# Application metrics
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+http_response_size = Histogram(
+    "http_response_size_bytes", "HTTP response body size by route template", ("method", "route"), buckets=SIZE_BUCKETS
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served", ("method",))
+mongo_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ("command", "collection", "outcome")
+)
+mongo_pool_checkout_wait = Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ("outcome",)
+)
+mongo_pool_checked_out = Gauge(
+    "mongodb_pool_connections_checked_out", "Pooled connections currently in use", ("address",)
+)
+mongo_pool_connections = Gauge("mongodb_pool_connections", "Open pooled connections", ("address",))
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "Time spent in bcrypt", ("operation",)
+)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and response size per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(method=method)
+            # The router stores the matched route in the scope; raw paths would explode cardinality
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(elapsed, method=method, route=route_path, status=status_code)
+            http_response_size.observe(size, method=method, route=route_path)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener feeding mongodb_command_duration_seconds."""
+
+    def __init__(self):
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = (
+                collection if isinstance(collection, str) else ""
+            )
+
+    def _finished(self, event, outcome: str):
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+        mongo_command_duration.observe(
+            event.duration_micros / 1_000_000, command=event.command_name, collection=collection, outcome=outcome
+        )
+
+    def succeeded(self, event):
+        self._finished(event, "success")
+
+    def failed(self, event):
+        self._finished(event, "failure")
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """pymongo pool listener measuring checkout wait time and connection usage."""
+
+    def __init__(self):
+        # Checkout runs synchronously on the calling thread, so the start time is thread-local
+        self._local = threading.local()
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def _observe_wait(self, outcome: str):
+        start = getattr(self._local, "checkout_start", None)
+        if start is not None:
+            self._local.checkout_start = None
+            mongo_pool_checkout_wait.observe(time.perf_counter() - start, outcome=outcome)
+
+    def connection_check_out_started(self, event):
+        self._local.checkout_start = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        self._observe_wait("success")
+        mongo_pool_checked_out.inc(address=self._address(event))
+
+    def connection_check_out_failed(self, event):
+        # reason is "timeout" when the pool is exhausted for waitQueueTimeoutMS
+        self._observe_wait(str(event.reason))
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec(address=self._address(event))
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(address=self._address(event))
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(address=self._address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
@@ -0,0 +1,230 @@
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from utils.auth import verify_token
+from utils.metrics import Counter, register_collector
+from utils.serialization import dumps
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rate limiting configuration
+# Reverse proxies in front of the API; the client address is taken that many hops back in X-Forwarded-For.
+# Set it to 0 when clients connect directly.
+RATE_LIMIT_PROXY_HOPS = int(os.environ.get("RATE_LIMIT_PROXY_HOPS", "0"))
+# Until the hop count is configured every client may share the proxy's address, so the
+# limiter stays off unless RATE_LIMIT_PROXY_HOPS is set or it is enabled explicitly
+RATE_LIMIT_ENABLED = os.environ.get(
+    "RATE_LIMIT_ENABLED", "true" if "RATE_LIMIT_PROXY_HOPS" in os.environ else "false"
+).lower() == "true"
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")  # "memory" or "mongo"
+RATE_LIMIT_SHARDS = int(os.environ.get("RATE_LIMIT_SHARDS", "16"))
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """A token bucket: capacity burst, refilled at rate tokens per second, per client key."""
+
+    name: str
+    key: str  # "ip" or "user"
+    rate: float
+    burst: int
+    shared: bool = False  # Counted in Mongo across workers when RATE_LIMIT_BACKEND is "mongo"
+
+# Login and registration run bcrypt, so they get tight per-IP limits
+LOGIN_POLICY = RateLimitPolicy("auth_login", "ip", rate=10 / 60, burst=10, shared=True)
+REGISTER_POLICY = RateLimitPolicy("auth_register", "ip", rate=5 / 60, burst=5, shared=True)
+WRITE_USER_POLICY = RateLimitPolicy("writes_user", "user", rate=5, burst=50)
+WRITE_IP_POLICY = RateLimitPolicy("writes_ip", "ip", rate=20, burst=200)
+
+# (methods, raw path prefix, policy); every matching rule applies
+RATE_LIMIT_RULES: List[Tuple[frozenset, str, RateLimitPolicy]] = [
+    (frozenset({"POST"}), "/api/auth/login", LOGIN_POLICY),
+    (frozenset({"POST"}), "/api/auth/register", REGISTER_POLICY),
+    (WRITE_METHODS, "/api/", WRITE_USER_POLICY),
+    (WRITE_METHODS, "/api/", WRITE_IP_POLICY),
+]
+
+throttled_requests = Counter(
+    "http_requests_throttled_total", "Requests rejected by the rate limiter", ("policy", "key")
+)
+
+class TokenBuckets:
+    """In-memory token buckets split across shards, each with its own lock.
+
+    A full bucket carries no information, so once a second one shard is swept
+    for buckets that have refilled, keeping memory bounded by the number of
+    recently active clients.
+    """
+
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS):
+        # Bucket: [tokens, updated, rate, burst]
+        self._shards: List[Dict[tuple, list]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._sweep_position = 0
+        self._swept_at = time.monotonic()
+
+    def take(self, policy: RateLimitPolicy, key: str, cost: float = 1.0) -> float:
+        """Take cost tokens; returns 0 if allowed, else seconds until enough tokens are available."""
+        bucket_key = (policy.name, key)
+        index = hash(bucket_key) % len(self._shards)
+        now = time.monotonic()
+        with self._locks[index]:
+            bucket = self._shards[index].get(bucket_key)
+            if bucket is None:
+                bucket = self._shards[index][bucket_key] = [float(policy.burst), now, policy.rate, policy.burst]
+            tokens = min(policy.burst, bucket[0] + (now - bucket[1]) * policy.rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                wait = 0.0
+            else:
+                bucket[0] = tokens
+                wait = (cost - tokens) / policy.rate
+        if now - self._swept_at >= 1.0:
+            self._sweep(now)
+        return wait
+
+    def _sweep(self, now: float):
+        self._swept_at = now
+        index = self._sweep_position = (self._sweep_position + 1) % len(self._shards)
+        with self._locks[index]:
+            shard = self._shards[index]
+            for bucket_key, (tokens, updated, rate, burst) in list(shard.items()):
+                if tokens + (now - updated) * rate >= burst:
+                    del shard[bucket_key]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+class MongoTokenBuckets:
+    """Token buckets shared by all workers, approximated with fixed windows in the rate_limits collection.
+
+    Each window lasts burst / rate seconds and admits burst requests, so the
+    long-run rate matches the policy. Documents expire through a TTL index.
+    """
+
+    async def take(self, db, policy: RateLimitPolicy, key: str) -> float:
+        window = policy.burst / policy.rate
+        now = time.time()
+        window_start = math.floor(now / window) * window
+        doc = await db.rate_limits.find_one_and_update(
+            {"_id": f"{policy.name}:{key}:{int(window_start)}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {"expiresAt": datetime.utcfromtimestamp(window_start) + timedelta(seconds=window * 2)},
+            },
+            upsert=True,
+            projection={"count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc["count"] <= policy.burst:
+            return 0.0
+        return window_start + window - now
+
+memory_buckets = TokenBuckets()
+mongo_buckets = MongoTokenBuckets()
+
+register_collector(lambda: [
+    ("rate_limit_buckets", "gauge", "Client token buckets held in memory", [({}, len(memory_buckets))]),
+])
+
+def client_ip(scope) -> str:
+    """The client address, looked up through the configured number of trusted proxies."""
+    if RATE_LIMIT_PROXY_HOPS > 0:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+                if hops:
+                    return hops[max(0, len(hops) - RATE_LIMIT_PROXY_HOPS)]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def authenticated_user(scope) -> Optional[str]:
+    """The user ID of a valid bearer token, from the decoded token cache when possible."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return verify_token(token.strip())["sub"]
+            except HTTPException:
+                return None
+    return None
+
+def matching_policies(method: str, path: str) -> List[RateLimitPolicy]:
+    return [policy for methods, prefix, policy in RATE_LIMIT_RULES if method in methods and path.startswith(prefix)]
+
+class RateLimitMiddleware:
+    """ASGI middleware applying token bucket policies by client IP and user.
+
+    Runs before routing, so throttled requests are rejected before their body
+    is read, validated or hashed.
+    """
+
+    def __init__(self, app, enabled: bool = RATE_LIMIT_ENABLED, backend: str = RATE_LIMIT_BACKEND):
+        self.app = app
+        self.enabled = enabled
+        self.backend = backend
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        policies = matching_policies(scope["method"], scope["path"])
+        if policies:
+            retry_after = await self._check(scope, policies)
+            if retry_after is not None:
+                await self._reject(send, retry_after)
+                return
+        await self.app(scope, receive, send)
+
+    async def _check(self, scope, policies: List[RateLimitPolicy]) -> Optional[float]:
+        """Charge every applicable bucket; returns seconds to wait if any is empty."""
+        ip = client_ip(scope)
+        user_id = None
+        for policy in policies:
+            if policy.key == "user":
+                user_id = user_id or authenticated_user(scope)
+                if user_id is None:
+                    # Anonymous requests are limited by the IP policies alone
+                    continue
+                key = user_id
+            else:
+                key = ip
+
+            if policy.shared and self.backend == "mongo":
+                try:
+                    wait = await mongo_buckets.take(scope["app"].state.resources.db, policy, key)
+                except Exception as e:
+                    logger.error(f"Shared rate limit check failed, using local buckets: {e}")
+                    wait = memory_buckets.take(policy, key)
+            else:
+                wait = memory_buckets.take(policy, key)
+
+            if wait > 0:
+                throttled_requests.inc(policy=policy.name, key=policy.key)
+                return wait
+        return None
+
+    async def _reject(self, send, retry_after: float):
+        body = dumps({"detail": "Too many requests, please retry later"})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
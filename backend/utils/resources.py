@@ -0,0 +1,102 @@
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from typing import Callable, Dict, List, Optional
+from utils.database import MongoSettings, configure_profiles, use_profile
+from utils.metrics import MongoCommandMetrics, MongoPoolMetrics
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Connections opened concurrently during warm-up so first requests skip the handshake
+MONGO_WARMUP_CONNECTIONS = int(os.environ.get("MONGO_WARMUP_CONNECTIONS", "10"))
+READY_PING_TIMEOUT = float(os.environ.get("READY_PING_TIMEOUT", "2"))
+
+class AppResources:
+    """Process-wide resources owned by the application lifespan.
+    
+    Created after the server forks its workers, so every worker gets its own
+    client and pools.
+    """
+    
+    def __init__(self, client, db: AsyncIOMotorDatabase, settings: Optional[MongoSettings] = None):
+        self.client = client
+        self.db = db
+        self.settings = settings
+        self.ready = False
+        self.warmup: Dict[str, dict] = {}
+        self.tasks: List[asyncio.Task] = []
+        self._shutdown_hooks: List[Callable[[], None]] = []
+    
+    @classmethod
+    def connect(cls, settings: MongoSettings) -> "AppResources":
+        """Create the Mongo client from settings; connections are opened lazily."""
+        configure_profiles(settings)
+        client = AsyncIOMotorClient(
+            settings.url,
+            event_listeners=[MongoCommandMetrics(), MongoPoolMetrics()],
+            **settings.client_options()
+        )
+        return cls(client, client[settings.db_name], settings)
+    
+    async def run_step(self, name: str, step):
+        """Run one warm-up step, recording its duration and outcome without raising."""
+        start = time.perf_counter()
+        try:
+            result = await step
+            self.warmup[name] = {"ok": True, "ms": round((time.perf_counter() - start) * 1000, 1)}
+            return result
+        except Exception as e:
+            logger.error(f"Warm-up step {name} failed: {e}")
+            self.warmup[name] = {"ok": False, "ms": round((time.perf_counter() - start) * 1000, 1), "error": str(e)}
+            return None
+    
+    async def prefill_pool(self, connections: int = MONGO_WARMUP_CONNECTIONS) -> int:
+        """Open pooled connections up front with concurrent pings."""
+        if self.settings is not None and self.settings.max_pool_size:
+            connections = min(connections, self.settings.max_pool_size)
+        await asyncio.gather(*(self.db.command("ping") for _ in range(max(1, connections))))
+        return connections
+    
+    async def ping(self, timeout: float = READY_PING_TIMEOUT):
+        await asyncio.wait_for(self.db.command("ping"), timeout)
+    
+    def start_task(self, coroutine) -> asyncio.Task:
+        """Run a background task that is cancelled on shutdown."""
+        task = asyncio.create_task(coroutine)
+        self.tasks.append(task)
+        return task
+    
+    def on_shutdown(self, hook: Callable[[], None]):
+        self._shutdown_hooks.append(hook)
+    
+    async def close(self):
+        """Stop background tasks and worker pools, then close the client."""
+        self.ready = False
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        for hook in self._shutdown_hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Shutdown hook failed: {e}")
+        if self.client is not None:
+            self.client.close()
+
+def get_resources(request: Request) -> AppResources:
+    """Dependency returning the resource container of the running app."""
+    return request.app.state.resources
+
+def get_db(request: Request) -> AsyncIOMotorDatabase:
+    """Dependency returning the application database."""
+    return request.app.state.resources.db
+
+def profiled_db(read: str = "primary", write: str = "default"):
+    """Build a dependency returning the database with a read/write profile applied."""
+    def dependency(request: Request):
+        return use_profile(request.app.state.resources.db, read=read, write=write)
+    return dependency
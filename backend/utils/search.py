@@ -0,0 +1,236 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from functools import lru_cache
+from typing import Dict, List, Optional
+from utils.database import use_profile
+import asyncio
+import bisect
+import heapq
+import html
+import logging
+import math
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Search configuration
+FAQ_SEARCH_BACKEND = os.environ.get("FAQ_SEARCH_BACKEND", "memory")  # "memory" or "text"
+
+# BM25 parameters and per-field weights
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {"question": 2.0, "answer": 1.0}
+PREFIX_WEIGHT = 0.7
+MAX_PREFIX_EXPANSIONS = 20
+SNIPPET_RADIUS = 80
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it me my of on or "
+    "our so that the their there this to was we what when where which who will with you your".split()
+)
+
+# Suffix rules applied longest-first; a light stemmer in the spirit of Porter step 1/2
+SUFFIX_RULES = [
+    ("ational", "ate"), ("ization", "ize"), ("fulness", "ful"), ("iveness", "ive"),
+    ("ements", ""), ("ement", ""), ("ations", "ate"), ("ation", "ate"),
+    ("ities", ""), ("ity", ""), ("ingly", ""), ("edly", ""), ("ings", ""), ("ing", ""),
+    ("ies", "y"), ("ied", "y"), ("sses", "ss"), ("ness", ""), ("ly", ""), ("ed", ""),
+    ("es", ""), ("s", ""),
+]
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Reduce a lowercase word to its stem."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= 3:
+            if suffix == "s" and word.endswith(("ss", "us", "is")):
+                return word
+            return word[: len(word) - len(suffix)] + replacement
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """Split text into stemmed, stopword-free terms."""
+    return [stem(word) for word in WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+
+def highlight(text: str, terms: set, snippet: bool = False) -> str:
+    """HTML-escape text and wrap words whose stem is in terms in <mark> tags.
+
+    With snippet=True only a window around the first match is returned.
+    """
+    lowered = text.lower()
+    matches = [m for m in WORD_RE.finditer(lowered) if stem(m.group()) in terms]
+
+    start, end = 0, len(text)
+    if snippet and len(text) > 2 * SNIPPET_RADIUS:
+        first = matches[0].start() if matches else 0
+        start = max(0, first - SNIPPET_RADIUS)
+        end = min(len(text), first + SNIPPET_RADIUS)
+        # Snap the window to word boundaries
+        if start > 0:
+            space = text.find(" ", start)
+            start = space + 1 if 0 <= space < first else start
+        if end < len(text):
+            space = text.rfind(" ", first, end)
+            end = space if space > first else end
+
+    parts = ["…" if start > 0 else ""]
+    position = start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        parts.append(html.escape(text[position:match.start()]))
+        parts.append(f"<mark>{html.escape(text[match.start():match.end()])}</mark>")
+        position = match.end()
+    parts.append(html.escape(text[position:end]))
+    parts.append("…" if end < len(text) else "")
+    return "".join(parts)
+
+def build_postings(docs: List[dict]) -> tuple:
+    """Build (docs, postings, vocabulary, norms) for a BM25 index over FAQ documents."""
+    postings: Dict[str, Dict[int, float]] = {}
+    lengths = []
+
+    for doc_id, doc in enumerate(docs):
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            terms = tokenize(doc.get(field) or "")
+            length += weight * len(terms)
+            for term in terms:
+                doc_tfs = postings.setdefault(term, {})
+                doc_tfs[doc_id] = doc_tfs.get(doc_id, 0.0) + weight
+        lengths.append(length)
+
+    average = (sum(lengths) / len(lengths)) if lengths else 1.0
+    norms = [BM25_K1 * (1 - BM25_B + BM25_B * length / (average or 1.0)) for length in lengths]
+
+    total = len(docs)
+    ranked = {}
+    for term, doc_tfs in postings.items():
+        idf = math.log(1 + (total - len(doc_tfs) + 0.5) / (len(doc_tfs) + 0.5))
+        ranked[term] = (idf, list(doc_tfs.keys()), list(doc_tfs.values()))
+
+    return docs, ranked, sorted(ranked), norms
+
+class FAQSearchIndex:
+    """In-memory inverted index over FAQs ranked with BM25.
+
+    The index is rebuilt on the first search after invalidate(), which the
+    cache invalidation channel calls whenever FAQs change in any worker.
+    """
+
+    def __init__(self):
+        self.docs: List[dict] = []
+        self.postings: Dict[str, tuple] = {}
+        self.vocabulary: List[str] = []
+        self.norms: List[float] = []
+        self.stale = True
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def build(self, docs: List[dict]):
+        """Rebuild the index from FAQ documents."""
+        self.docs, self.postings, self.vocabulary, self.norms = build_postings(docs)
+        self.stale = False
+
+    def invalidate(self):
+        """Mark the index for rebuilding on the next search."""
+        self._generation += 1
+        self.stale = True
+
+    async def refresh(self, db: AsyncIOMotorDatabase, force: bool = False):
+        """Reload active FAQs from the database if the index is out of date."""
+        async with self._lock:
+            if not force and not self.stale:
+                return
+            generation = self._generation
+            start = time.perf_counter()
+            # Preserve the listing order so ties rank the way GET /faqs does
+            cursor = db.faqs.find({"isActive": True}).sort([("order", 1), ("createdAt", -1)])
+            docs = await cursor.to_list(length=None)
+            # Building takes seconds for large FAQ sets, so keep it off the event loop;
+            # searches use the previous index until the new one is swapped in whole
+            built = await asyncio.to_thread(build_postings, docs)
+            self.docs, self.postings, self.vocabulary, self.norms = built
+            # An invalidation that arrived while building leaves the index stale
+            self.stale = generation != self._generation
+            logger.info(f"FAQ search index built over {len(docs)} FAQs in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def query_terms(self, query: str) -> Dict[str, float]:
+        """Map a query to index terms and weights, expanding the last word as a prefix."""
+        words = [word for word in WORD_RE.findall(query.lower()) if word not in STOPWORDS]
+        terms = {stem(word): 1.0 for word in words}
+
+        if words and not query[-1:].isspace():
+            prefix = words[-1]
+            position = bisect.bisect_left(self.vocabulary, prefix)
+            expansions = 0
+            while (
+                position < len(self.vocabulary)
+                and self.vocabulary[position].startswith(prefix)
+                and expansions < MAX_PREFIX_EXPANSIONS
+            ):
+                terms.setdefault(self.vocabulary[position], PREFIX_WEIGHT)
+                position += 1
+                expansions += 1
+        return terms
+
+    def search(self, query: str, category: Optional[str] = None, limit: int = 100) -> List[tuple]:
+        """Return up to limit (score, doc, matched_terms) tuples, best first."""
+        terms = self.query_terms(query)
+        scores: Dict[int, float] = {}
+
+        for term, weight in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            idf, doc_ids, tfs = posting
+            norms = self.norms
+            for doc_id, tf in zip(doc_ids, tfs):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * tf * (BM25_K1 + 1) / (tf + norms[doc_id])
+
+        if category:
+            needle = category.lower()
+            scores = {
+                doc_id: score for doc_id, score in scores.items()
+                if needle in (self.docs[doc_id].get("category") or "").lower()
+            }
+
+        # Ties keep index order, which follows the FAQ display order
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        matched = set(terms)
+        return [(score, self.docs[doc_id], matched) for doc_id, score in best]
+
+faq_search_index = FAQSearchIndex()
+
+async def search_faqs_text(db: AsyncIOMotorDatabase, query: str, category: Optional[str] = None, limit: int = 100) -> List[tuple]:
+    """Fallback search through Mongo's $text index."""
+    mongo_query = {"isActive": True, "$text": {"$search": query}}
+    if category:
+        mongo_query["category"] = {"$regex": re.escape(category), "$options": "i"}
+
+    cursor = (
+        db.faqs.find(mongo_query, {"score": {"$meta": "textScore"}})
+        .sort([("score", {"$meta": "textScore"})])
+        .limit(limit)
+    )
+    docs = await cursor.to_list(length=limit)
+    matched = set(tokenize(query))
+    return [(doc.pop("score", 0.0), doc, matched) for doc in docs]
+
+async def search_faqs_ranked(db: AsyncIOMotorDatabase, query: str, category: Optional[str] = None, limit: int = 100) -> List[tuple]:
+    """Search FAQs with the configured backend, falling back to $text if the index cannot be built."""
+    # $text results are not cached, so they can be served by the reference read profile
+    text_db = use_profile(db, read="reference")
+    if FAQ_SEARCH_BACKEND == "text":
+        return await search_faqs_text(text_db, query, category, limit)
+
+    try:
+        await faq_search_index.refresh(db)
+    except Exception as e:
+        logger.error(f"FAQ search index refresh failed, using $text fallback: {e}")
+        return await search_faqs_text(text_db, query, category, limit)
+    return faq_search_index.search(query, category, limit)
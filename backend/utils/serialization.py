@@ -0,0 +1,59 @@
+from fastapi import Response
+from pydantic import BaseModel
+from bson import ObjectId
+from datetime import date, datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Optional, Type
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+def _default(value):
+    """Encode BSON and other non-JSON types."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload) -> bytes:
+    """Serialize a payload containing BSON values straight to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+@lru_cache(maxsize=None)
+def _model_layout(model: Type[BaseModel]) -> tuple:
+    """(field name, has default, default) for each field of a response model, in order."""
+    layout = []
+    for name, field in model.model_fields.items():
+        required = field.is_required()
+        default = None if required else field.get_default(call_default_factory=True)
+        layout.append((name, not required, default))
+    return tuple(layout)
+
+def shape_document(document: dict, model: Type[BaseModel]) -> dict:
+    """Shape a Mongo document like model(**document).dict() without building the model.
+    
+    The response models stay the source of truth for field order and defaults
+    (and for the OpenAPI schema), but rows are not validated or copied again.
+    """
+    shaped = {}
+    for name, has_default, default in _model_layout(model):
+        if name == "id":
+            shaped["id"] = str(document["_id"])
+        elif name in document:
+            shaped[name] = document[name]
+        elif has_default:
+            shaped[name] = default.copy() if isinstance(default, (list, dict)) else default
+    return shaped
+
+def json_response(payload, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Return a payload as a raw JSON response, bypassing jsonable_encoder."""
+    return Response(content=dumps(payload), status_code=status_code, media_type="application/json", headers=headers)
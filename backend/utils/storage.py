@@ -0,0 +1,340 @@
+from fastapi import HTTPException, Request, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from models.visa_application import DocumentType
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import uuid
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# Storage configuration
+UPLOAD_DIR = Path(os.environ.get("UPLOAD_DIR", "/app/uploads"))
+UPLOAD_WRITE_BUFFER = int(os.environ.get("UPLOAD_WRITE_BUFFER", str(1024 * 1024)))
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+MB = 1024 * 1024
+
+# Per-document-type size limits, enforced while the body streams in
+MAX_DOCUMENT_SIZES = {
+    DocumentType.PASSPORT: 20 * MB,
+    DocumentType.PHOTO: 5 * MB,
+    DocumentType.BANK_STATEMENT: 20 * MB,
+    DocumentType.EMPLOYMENT_LETTER: 10 * MB,
+    DocumentType.TRAVEL_ITINERARY: 10 * MB,
+    DocumentType.HOTEL_BOOKING: 10 * MB,
+}
+
+ALLOWED_CONTENT_TYPES = {"application/pdf", "image/jpeg", "image/png", "image/webp"}
+
+# Multipart overhead allowed on top of the file size in Content-Length checks
+MULTIPART_OVERHEAD = 16 * 1024
+
+# A blob being collected blocks new references to it; a collection that has not
+# finished after this long is assumed to have died and is taken over
+BLOB_COLLECT_TIMEOUT_SECONDS = 60
+BLOB_COLLECT_POLL_SECONDS = 0.1
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def blob_path(sha256: str) -> Path:
+    """Content-addressed location of a stored file."""
+    return UPLOAD_DIR / "blobs" / sha256[:2] / sha256[2:4] / sha256
+
+def rendition_dir(sha256: str) -> Path:
+    """Directory holding the derived images of a stored file."""
+    return UPLOAD_DIR / "renditions" / sha256[:2] / sha256
+
+def sanitize_filename(filename: str) -> str:
+    """Strip directories and control characters from a client-supplied filename."""
+    name = os.path.basename(filename.replace("\\", "/"))
+    name = "".join(char for char in name if char.isprintable() and char not in '"')
+    return name[:255] or "document"
+
+class StreamingUpload:
+    """Writes an upload to a temporary file in fixed-size chunks while hashing it."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self._buffer = bytearray()
+        tmp_dir = UPLOAD_DIR / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.temp_path = tmp_dir / uuid.uuid4().hex
+        self._file = open(self.temp_path, "wb")
+
+    async def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds the {self.max_size // MB} MB limit for this document type"
+            )
+        self.sha256.update(data)
+        self._buffer.extend(data)
+        if len(self._buffer) >= UPLOAD_WRITE_BUFFER:
+            await self._flush()
+
+    async def _flush(self):
+        if self._buffer:
+            chunk = bytes(self._buffer)
+            self._buffer.clear()
+            await asyncio.to_thread(self._file.write, chunk)
+
+    async def finish(self) -> Tuple[str, int]:
+        """Flush and close the temporary file; returns (sha256, size).
+
+        store_blob() moves the file to its content address.
+        """
+        await self._flush()
+        await asyncio.to_thread(self._file.close)
+        return self.sha256.hexdigest(), self.size
+
+    def abort(self):
+        self._file.close()
+        self.temp_path.unlink(missing_ok=True)
+
+async def receive_upload(request: Request, document_type: DocumentType) -> dict:
+    """Stream a multipart/form-data body's "file" part to disk without buffering it in memory."""
+    max_size = MAX_DOCUMENT_SIZES[document_type]
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data body"
+        )
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {max_size // MB} MB limit for this document type"
+        )
+
+    # Parser callbacks are synchronous, so they queue events that are handled after each chunk
+    events = []
+    headers = {}
+    header_field = bytearray()
+    header_value = bytearray()
+
+    def on_header_field(data, start, end):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data, start, end):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        events.append(("headers", dict(headers)))
+        headers.clear()
+
+    def on_part_data(data, start, end):
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end():
+        events.append(("end", None))
+
+    parser = MultipartParser(boundary, {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    upload: Optional[StreamingUpload] = None
+    in_file_part = False
+    result = None
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for event, payload in events:
+                if event == "headers":
+                    _, disposition = parse_options_header(payload.get(b"content-disposition", b""))
+                    in_file_part = disposition.get(b"name") == b"file" and b"filename" in disposition and result is None
+                    if in_file_part:
+                        part_type = payload.get(b"content-type", b"application/octet-stream").decode("latin-1").lower()
+                        if part_type not in ALLOWED_CONTENT_TYPES:
+                            raise HTTPException(
+                                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                detail=f"Unsupported file type: {part_type}"
+                            )
+                        upload = StreamingUpload(max_size)
+                        result = {
+                            "fileName": sanitize_filename(disposition[b"filename"].decode("utf-8", "replace")),
+                            "contentType": part_type,
+                        }
+                elif event == "data" and in_file_part:
+                    await upload.write(payload)
+                elif event == "end" and in_file_part:
+                    in_file_part = False
+                    result["sha256"], result["size"] = await upload.finish()
+                    result["tempPath"] = upload.temp_path
+                    upload = None
+            events.clear()
+        parser.finalize()
+    except BaseException:
+        if upload is not None:
+            upload.abort()
+        if result and "tempPath" in result:
+            result["tempPath"].unlink(missing_ok=True)
+        raise
+
+    if result is None or "sha256" not in result:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='No complete "file" part in the upload'
+        )
+    return result
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range Range header into inclusive (start, end).
+
+    Returns None when the header should be ignored (e.g. multiple ranges) and
+    raises 416 when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(0, size - int(last))
+        end = size - 1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+async def iter_file_range(path: Path, start: int, end: int) -> AsyncIterator[bytes]:
+    """Read an inclusive byte range of a file in chunks off the event loop."""
+    with open(path, "rb") as file:
+        position = start
+        while position <= end:
+            length = min(DOWNLOAD_CHUNK_SIZE, end - position + 1)
+            chunk = await asyncio.to_thread(os.pread, file.fileno(), length, position)
+            if not chunk:
+                break
+            position += len(chunk)
+            yield chunk
+
+async def register_blob(db: AsyncIOMotorDatabase, sha256: str, size: int, content_type: str):
+    """Record a stored blob and take the reference held by its new upload record.
+
+    Waits while the blob is being collected, so the caller never moves a file
+    into place that the collection is about to remove.
+    """
+    while True:
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=BLOB_COLLECT_TIMEOUT_SECONDS)
+        try:
+            await db.blobs.update_one(
+                {"_id": sha256, "$or": [{"collectingAt": None}, {"collectingAt": {"$lt": stale}}]},
+                {
+                    "$setOnInsert": {"size": size, "contentType": content_type, "createdAt": now},
+                    "$inc": {"refCount": 1},
+                    "$unset": {"collectingAt": ""}
+                },
+                upsert=True
+            )
+            return
+        except DuplicateKeyError:
+            # The filter did not match, so the blob is being collected
+            await asyncio.sleep(BLOB_COLLECT_POLL_SECONDS)
+
+async def store_blob(db: AsyncIOMotorDatabase, stored: dict):
+    """Take an upload's reference to its blob, then move the received file to its content address.
+
+    Replacing an identical blob is harmless and restores it if it was
+    collected while the upload was in flight.
+    """
+    try:
+        await register_blob(db, stored["sha256"], stored["size"], stored["contentType"])
+        target = blob_path(stored["sha256"])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(os.replace, stored["tempPath"], target)
+    finally:
+        stored["tempPath"].unlink(missing_ok=True)
+
+async def retain_blob(db: AsyncIOMotorDatabase, sha256: str) -> bool:
+    """Add a reference to a blob; False if it has been or is being collected."""
+    result = await db.blobs.update_one({"_id": sha256, "collectingAt": None}, {"$inc": {"refCount": 1}})
+    return result.matched_count == 1
+
+async def release_unattached_uploads(db: AsyncIOMotorDatabase, user_id: str, hashes: List[str]) -> List[str]:
+    """Delete the user's upload records for these hashes that no application of theirs uses.
+
+    Returns the hashes whose references the deleted records held, for release_blobs().
+    """
+    if not hashes:
+        return []
+    attached = set(await db.visa_applications.distinct(
+        "documents.documentId", {"userId": user_id, "documents.sha256": {"$in": hashes}}
+    ))
+    released = []
+    async for upload in db.documents.find({"userId": user_id, "sha256": {"$in": hashes}}, {"sha256": 1}):
+        if str(upload["_id"]) in attached:
+            continue
+        result = await db.documents.delete_one({"_id": upload["_id"]})
+        if result.deleted_count:
+            released.append(upload["sha256"])
+    return released
+
+async def release_blobs(db: AsyncIOMotorDatabase, hashes: List[str]) -> int:
+    """Drop references and collect blobs that are no longer referenced.
+
+    Returns the number of blobs removed.
+    """
+    collected = 0
+    for sha256 in hashes:
+        blob = await db.blobs.find_one_and_update(
+            {"_id": sha256},
+            {"$inc": {"refCount": -1}},
+            projection={"refCount": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob is None or blob["refCount"] > 0:
+            continue
+        # Claim the collection; a concurrent retain wins, and new uploads wait until the record is gone
+        claimed = await db.blobs.update_one(
+            {"_id": sha256, "refCount": {"$lte": 0}, "collectingAt": None},
+            {"$set": {"collectingAt": datetime.utcnow()}}
+        )
+        if claimed.modified_count == 0:
+            continue
+        await asyncio.to_thread(blob_path(sha256).unlink, missing_ok=True)
+        await asyncio.to_thread(shutil.rmtree, rendition_dir(sha256), ignore_errors=True)
+        # Files go before the record, so an upload waiting on it places its file afterwards
+        await db.blobs.delete_one({"_id": sha256, "collectingAt": {"$ne": None}})
+        collected += 1
+    if collected:
+        logger.info(f"Collected {collected} unreferenced document blob(s)")
+    return collected
@@ -0,0 +1,143 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+from models.visa_application import ApplicationStatus
+from utils.database import use_profile
+from utils.locks import run_exclusive
+from utils.metrics import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# How often the counters are recomputed from visa_applications
+SUMMARY_RECONCILE_SECONDS = float(os.environ.get("SUMMARY_RECONCILE_SECONDS", "3600"))
+
+GLOBAL_SUMMARY_ID = "global"
+# Lease held while one worker reconciles, so the others skip the run
+SUMMARY_RECONCILE_LOCK = "summary_reconciliation"
+
+summary_drift = Counter(
+    "application_summary_drift_total", "Summary documents corrected by reconciliation", ("scope",)
+)
+
+def user_summary_id(user_id: str) -> str:
+    return f"user:{user_id}"
+
+def empty_counts() -> Dict[str, int]:
+    return {application_status.value: 0 for application_status in ApplicationStatus}
+
+def format_summary(document: Optional[dict]) -> dict:
+    """Shape a summary document for the API, with every status present."""
+    counts = empty_counts()
+    if document:
+        counts.update({key: value for key, value in document.get("counts", {}).items() if key in counts})
+    return {
+        "counts": counts,
+        "total": sum(counts.values()),
+        "updatedAt": document.get("updatedAt") if document else None
+    }
+
+async def get_summary(db: AsyncIOMotorDatabase, user_id: Optional[str] = None) -> dict:
+    """Read a user's (or the global) counters with a single primary-key lookup."""
+    summary_id = user_summary_id(user_id) if user_id else GLOBAL_SUMMARY_ID
+    return format_summary(await db.application_summaries.find_one({"_id": summary_id}))
+
+async def record_status_changes(
+    db: AsyncIOMotorDatabase,
+    changes: Iterable[Tuple[str, Optional[str], Optional[str]]]
+):
+    """Apply (user_id, old_status, new_status) changes to the counters with $inc.
+    
+    None as old_status means created and None as new_status means deleted.
+    Failures are logged rather than raised; reconciliation repairs the drift.
+    """
+    deltas: Dict[str, Dict[str, int]] = {}
+    for user_id, old_status, new_status in changes:
+        for summary_id in (user_summary_id(user_id), GLOBAL_SUMMARY_ID):
+            summary = deltas.setdefault(summary_id, {})
+            if old_status is not None:
+                key = f"counts.{ApplicationStatus(old_status).value}"
+                summary[key] = summary.get(key, 0) - 1
+            if new_status is not None:
+                key = f"counts.{ApplicationStatus(new_status).value}"
+                summary[key] = summary.get(key, 0) + 1
+    
+    now = datetime.utcnow()
+    operations = []
+    for summary_id, increments in deltas.items():
+        increments = {key: value for key, value in increments.items() if value}
+        if increments:
+            operations.append(UpdateOne(
+                {"_id": summary_id},
+                {"$inc": increments, "$set": {"updatedAt": now}},
+                upsert=True
+            ))
+    if not operations:
+        return
+    
+    try:
+        await use_profile(db, write="counter").application_summaries.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.error(f"Failed to update application summaries: {e}")
+
+async def reconcile_summaries(db: AsyncIOMotorDatabase) -> dict:
+    """Recompute every summary from visa_applications and fix documents that drifted.
+    
+    Increments landing while this runs can be overwritten; the next run corrects them.
+    """
+    expected: Dict[str, Dict[str, int]] = {GLOBAL_SUMMARY_ID: empty_counts()}
+    pipeline = [{"$group": {"_id": {"userId": "$userId", "status": "$status"}, "count": {"$sum": 1}}}]
+    async for group in db.visa_applications.aggregate(pipeline):
+        user_id, application_status = group["_id"].get("userId"), group["_id"].get("status")
+        if user_id is None or application_status not in expected[GLOBAL_SUMMARY_ID]:
+            continue
+        expected.setdefault(user_summary_id(user_id), empty_counts())[application_status] += group["count"]
+        expected[GLOBAL_SUMMARY_ID][application_status] += group["count"]
+    
+    now = datetime.utcnow()
+    operations = []
+    corrected = {"user": 0, "global": 0}
+    async for document in db.application_summaries.find({}, {"counts": 1}):
+        counts = expected.pop(document["_id"], None)
+        if counts is None:
+            if any(document.get("counts", {}).values()):
+                corrected["user"] += 1
+            operations.append(DeleteOne({"_id": document["_id"]}))
+        elif format_summary(document)["counts"] != counts:
+            corrected["global" if document["_id"] == GLOBAL_SUMMARY_ID else "user"] += 1
+            operations.append(ReplaceOne({"_id": document["_id"]}, {"counts": counts, "updatedAt": now}))
+    for summary_id, counts in expected.items():
+        if any(counts.values()):
+            corrected["global" if summary_id == GLOBAL_SUMMARY_ID else "user"] += 1
+        operations.append(ReplaceOne({"_id": summary_id}, {"counts": counts, "updatedAt": now}, upsert=True))
+    
+    if operations:
+        await db.application_summaries.bulk_write(operations, ordered=False)
+    for scope, count in corrected.items():
+        if count:
+            summary_drift.inc(count, scope=scope)
+    logger.info(f"Application summaries reconciled: {corrected['user']} user and {corrected['global']} global corrected")
+    return corrected
+
+async def run_reconciliation(get_db, interval: float = SUMMARY_RECONCILE_SECONDS):
+    """Reconcile summaries now and then every interval seconds until cancelled.
+    
+    The first run also backfills summaries for applications created before they existed.
+    Every worker runs this loop, but a lease lets only one of them reconcile
+    per interval.
+    """
+    while True:
+        try:
+            db = get_db()
+            await run_exclusive(
+                db,
+                SUMMARY_RECONCILE_LOCK,
+                lambda: reconcile_summaries(db),
+                not_completed_since=datetime.utcnow() - timedelta(seconds=interval)
+            )
+        except Exception as e:
+            logger.error(f"Application summary reconciliation failed: {e}")
+        await asyncio.sleep(interval)